@@ -0,0 +1,71 @@
+"""Compare bytes on the wire and decode cost of the payload encodings.
+
+Run from the repository root:
+
+    python benchmarks/codec_benchmark.py [bank.json ...]
+
+Each file is a bank message as the dongle publishes it in JSON. With no
+arguments the banks in benchmarks/fixtures are used; these are synthetic,
+with the keys of a real inputbank1 and plausible values, not a capture.
+MessagePack and CBOR are measured when msgpack and cbor2 are installed,
+as they are alongside the integration.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+import importlib.util
+import json
+from pathlib import Path
+import sys
+import timeit
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+# Load codec.py on its own so Home Assistant doesn't need to be installed
+_spec = importlib.util.spec_from_file_location(
+    "monitormysolar_codec", ROOT / "custom_components" / "monitormysolar" / "codec.py"
+)
+codec = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(codec)
+
+
+def encoders() -> dict[str, Callable[[object], bytes]]:
+    """Return an encoder for every encoding the codec can decode."""
+    result = {codec.ENCODING_JSON: lambda data: json.dumps(data, separators=(",", ":")).encode()}
+    if codec.msgpack is not None:
+        result[codec.ENCODING_MSGPACK] = codec.msgpack.packb
+    if codec.cbor2 is not None:
+        result[codec.ENCODING_CBOR] = codec.cbor2.dumps
+    return result
+
+
+def bench(path: Path, number: int) -> None:
+    """Print size and decode time of one bank in every encoding."""
+    data = json.loads(path.read_text())
+    print(f"{path.name}: {len(data.get('payload', data))} keys")
+    baseline = None
+    for encoding, encode in encoders().items():
+        payload = encode(data)
+        decode = codec.get_decoder(encoding)
+        assert decode(payload) == data, f"{encoding} did not round-trip"
+        seconds = min(timeit.repeat(lambda: decode(payload), number=number, repeat=5))
+        micros = seconds / number * 1e6
+        if baseline is None:
+            baseline = (len(payload), micros)
+        print(
+            f"  {encoding:8} {len(payload):6} bytes ({len(payload) / baseline[0]:4.0%})"
+            f"  {micros:7.2f} us/decode ({micros / baseline[1]:4.0%})"
+        )
+
+
+def main(argv: list[str]) -> None:
+    paths = [Path(arg) for arg in argv] or sorted(FIXTURES.glob("*.json"))
+    json_impl = "orjson" if codec.orjson is not None else "json"
+    print(f"JSON decoder: {json_impl}; available encodings: {', '.join(codec.supported_encodings())}")
+    for path in paths:
+        bench(path, number=20000)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,6 +1,18 @@
 from homeassistant.core import HomeAssistant
-from .const import LOGGER
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+from .const import DOMAIN, LOGGER, PLATFORMS
 from .coordinator import MonitorMySolar, MonitorMySolarEntry
+from .services import async_setup_services
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the services shared by every dongle."""
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: MonitorMySolarEntry):
     # try:
@@ -20,3 +32,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: MonitorMySolarEntry):
     # except Exception as e:
     #     LOGGER.error(f"Failed to set up Monitor My Solar: {e}")
     #     return False
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: MonitorMySolarEntry) -> bool:
+    """Unload a config entry so options changes can reload it."""
+    LOGGER.info(f"Unloading Monitor My Solar for {entry.data.get('inverter_brand')}")
+    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
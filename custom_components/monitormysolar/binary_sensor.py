@@ -1,6 +1,6 @@
 """Battery status binary sensors."""
 from homeassistant.components.binary_sensor import BinarySensorEntity
-from homeassistant.core import callback, HomeAssistant
+from homeassistant.core import callback, HomeAssistant, State
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.event import (
     async_track_state_change_event,
@@ -82,22 +82,26 @@ class BatteryStatusBinarySensor(MonitorMySolarEntity, BinarySensorEntity):
             "manufacturer": f"{self._manufacturer}",
         }
 
+    def _restore_state(self, last_state: State) -> bool:
+        """Restore from the Allowed/Forbidden state we write."""
+        self._state = last_state.state == "Allowed"
+        return True
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
 
         # This method is called by your DataUpdateCoordinator when a successful update runs.
-        if self.entity_id in self.coordinator.entities:
-            value = self.coordinator.entities[self.entity_id]
-            if value is not None:
-                LOGGER.warning(f"entity_id: {self.entity_id}")
-                LOGGER.warning(f"parent_sensor: {self._parent_sensor}")
-                # Check if this update is for our parent sensor (BatStatusINV)
-                # if event_entity_id.endswith(self._parent_sensor.lower()):
-                #     try:
-                #         status_value = str(int(value)).zfill(2)
-                #         if status_value in BATTERY_STATUS_MAP:
-                #             self._state = BATTERY_STATUS_MAP[status_value][self._status_type]
-                #             self.async_write_ha_state()
-                #     except ValueError:
-                #         LOGGER.debug(f"Invalid battery status value: {value}")
\ No newline at end of file
+        value = self.coordinator.entities.get_slot(self._slot)
+        if value is not None:
+            LOGGER.warning(f"entity_id: {self.entity_id}")
+            LOGGER.warning(f"parent_sensor: {self._parent_sensor}")
+            # Check if this update is for our parent sensor (BatStatusINV)
+            # if event_entity_id.endswith(self._parent_sensor.lower()):
+            #     try:
+            #         status_value = str(int(value)).zfill(2)
+            #         if status_value in BATTERY_STATUS_MAP:
+            #             self._state = BATTERY_STATUS_MAP[status_value][self._status_type]
+            #             self.async_write_ha_state()
+            #     except ValueError:
+            #         LOGGER.debug(f"Invalid battery status value: {value}")
\ No newline at end of file
@@ -7,6 +7,7 @@ from homeassistant.helpers.event import (
 from .const import DOMAIN, ENTITIES, FIRMWARE_CODES, LOGGER
 from .coordinator import MonitorMySolarEntry
 from .entity import MonitorMySolarEntity
+from .mqttHandeler import CommandPriority
 
 async def async_setup_entry(hass, entry: MonitorMySolarEntry, async_add_entities):
     coordinator = entry.runtime_data
@@ -78,6 +79,10 @@ class FirmwareUpdateButton(MonitorMySolarEntity, ButtonEntity):
             "manufacturer": f"{self._manufacturer}",
         }
 
+    def _restore_state(self, last_state) -> bool:
+        """ButtonEntity restores its own last press."""
+        return False
+
     async def async_press(self):
         """Handle the button press."""
         formatted_dongle_id = self._dongle_id.replace(":", "_")
@@ -98,7 +103,10 @@ class FirmwareUpdateButton(MonitorMySolarEntity, ButtonEntity):
         if sw_version < latest_firmware_version:
             # Firmware update is needed
             LOGGER.info(f"Firmware update button pressed for {formatted_dongle_id}")
-            await self.coordinator.mqtt_handler.send_update(self._dongle_id, "firmware_update", "updatedongle", self)
+            # Nothing else may be sent to the dongle while it updates
+            await self.coordinator.mqtt_handler.send_update(
+                self._dongle_id, "firmware_update", "updatedongle", self, exclusive=True, apply_result=False
+            )
         else:
             # No update needed
             LOGGER.info(f"No firmware update needed for {formatted_dongle_id}. SW_VERSION: {sw_version}, LatestFirmwareVersion: {latest_firmware_version}")
@@ -141,12 +149,18 @@ class RestartButton(MonitorMySolarEntity, ButtonEntity):
             "manufacturer": f"{self._manufacturer}",
         }
 
+    def _restore_state(self, last_state) -> bool:
+        """ButtonEntity restores its own last press."""
+        return False
+
     async def async_press(self):
 
         value = "1"
         await self.coordinator.mqtt_handler.send_update(
                 self._dongle_id.replace("_", "-"),
-                self._button_type["unique_id"],
+                self._button_type,
                 value,
                 self,
+                priority=CommandPriority.CONTROL,
+                apply_result=False,
             )
\ No newline at end of file
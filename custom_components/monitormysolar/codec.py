@@ -0,0 +1,94 @@
+"""Payload decoding for Monitor My Solar dongle messages."""
+from __future__ import annotations
+
+from collections.abc import Callable
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson ships with Home Assistant but keep a fallback
+    orjson = None
+
+# The manifest installs both binary encodings; should one be missing the
+# dongle is only offered the ones that import
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+if orjson is not None:
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError and ValueError
+    json_loads = orjson.loads
+else:
+    json_loads = json.loads
+
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+ENCODING_CBOR = "cbor"
+
+# First byte of a JSON document, allowing for leading whitespace
+_JSON_START = frozenset(b'{["\t\n\r ')
+
+
+def is_empty(payload: bytes | str | None) -> bool:
+    """Return True for a missing or whitespace-only payload without copying it."""
+    return not payload or payload.isspace()
+
+
+def decode_json(payload: bytes | str) -> Any:
+    """Decode a JSON payload straight from the raw MQTT bytes."""
+    return json_loads(payload)
+
+
+def _decode_msgpack(payload: bytes) -> Any:
+    """Decode a MessagePack payload."""
+    # msgpack's unpack errors are ValueError subclasses, except truncated input on older releases
+    try:
+        return msgpack.unpackb(payload)
+    except EOFError as err:
+        raise ValueError("Truncated MessagePack payload") from err
+
+
+def _decode_cbor(payload: bytes) -> Any:
+    """Decode a CBOR payload."""
+    # CBORDecodeError subclasses ValueError
+    return cbor2.loads(payload)
+
+
+_BINARY_DECODERS: dict[str, Callable[[bytes], Any]] = {}
+if msgpack is not None:
+    _BINARY_DECODERS[ENCODING_MSGPACK] = _decode_msgpack
+if cbor2 is not None:
+    _BINARY_DECODERS[ENCODING_CBOR] = _decode_cbor
+
+
+def supported_encodings() -> list[str]:
+    """Return the encodings we can decode, most preferred first."""
+    return [*_BINARY_DECODERS, ENCODING_JSON]
+
+
+def get_decoder(encoding: str) -> Callable[[bytes | str], Any]:
+    """Return a decoder for a negotiated encoding.
+
+    Binary decoders still accept JSON so topics the dongle has not switched
+    over (or firmware that falls back) keep working. Raises ValueError for
+    an encoding we cannot decode.
+    """
+    if encoding == ENCODING_JSON:
+        return decode_json
+    binary_decoder = _BINARY_DECODERS.get(encoding)
+    if binary_decoder is None:
+        raise ValueError(f"Unsupported payload encoding: {encoding}")
+
+    def decode(payload: bytes | str) -> Any:
+        if isinstance(payload, str) or payload[0] in _JSON_START:
+            return json_loads(payload)
+        return binary_decoder(payload)
+
+    return decode
@@ -1,7 +1,20 @@
 import logging
 import voluptuous as vol
 from homeassistant import config_entries
-from .const import DOMAIN
+from homeassistant.core import callback
+from .const import (
+    CONF_COALESCE_WINDOW,
+    CONF_DEADBAND_SCALE,
+    CONF_MAX_INTERVAL,
+    CONF_RESTORE_MAX_AGE,
+    CONF_STATE_FILTER,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_DEADBAND_SCALE,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_RESTORE_MAX_AGE,
+    DEFAULT_STATE_FILTER,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,3 +53,45 @@ class InverterMQTTFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_setup_entry(self, hass, entry):
         _LOGGER.info("Monitor My Solar Being Setup")
         return True
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return MonitorMySolarOptionsFlow()
+
+
+class MonitorMySolarOptionsFlow(config_entries.OptionsFlow):
+    """Handle Monitor My Solar options."""
+
+    async def async_step_init(self, user_input=None):
+        if user_input is not None:
+            _LOGGER.debug("Options received: %s", user_input)
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_STATE_FILTER,
+                    default=options.get(CONF_STATE_FILTER, DEFAULT_STATE_FILTER),
+                ): bool,
+                vol.Required(
+                    CONF_DEADBAND_SCALE,
+                    default=options.get(CONF_DEADBAND_SCALE, DEFAULT_DEADBAND_SCALE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                vol.Required(
+                    CONF_MAX_INTERVAL,
+                    default=options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                vol.Required(
+                    CONF_COALESCE_WINDOW,
+                    default=options.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1000)),
+                vol.Required(
+                    CONF_RESTORE_MAX_AGE,
+                    default=options.get(CONF_RESTORE_MAX_AGE, DEFAULT_RESTORE_MAX_AGE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=604800)),
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=schema)
@@ -1,27 +1,213 @@
 from __future__ import annotations
+import asyncio
 import json
-from typing import Any, cast
+from collections.abc import Awaitable, Callable, Iterator
+from functools import partial
+import time
+from typing import Any, NamedTuple, cast
 from propcache import cached_property
 
 from homeassistant.components import mqtt
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import (
+    CALLBACK_TYPE,
     HomeAssistant,
     callback,
 )
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.event import (
     async_call_later,
 )
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from .mqttHandeler import MQTTHandler
+from homeassistant.util import dt as dt_util
+from .codec import ENCODING_JSON, decode_json, get_decoder, is_empty, supported_encodings
+from .expressions import DerivedMetric, compile_metric, order_metrics
+from .mqttHandeler import CommandPriority, MQTTHandler
+from .registers import RegisterField, build_register_layouts, unpack_registers
+from .state_store import StateStore
 
 from .const import (
+    BANK_CADENCE_SMOOTHING,
+    BANK_STALE_DEFAULT_TIMEOUT,
+    BANK_STALE_FACTOR,
+    BANK_STALE_MIN_TIMEOUT,
+    COALESCE_MAX_DELAY,
+    DIAGNOSTIC_PUBLISH_INTERVAL,
+    CONF_COALESCE_WINDOW,
+    DEFAULT_COALESCE_WINDOW,
+    DELTA_SEQUENCE_MODULO,
     DOMAIN,
     ENTITIES,
+    HOLD_BANKS,
+    INGEST_QUEUE_SIZE,
+    INPUT_BANKS,
     LOGGER,
     PLATFORMS,
+    RESYNC_TIMEOUT,
+    SIGNAL_BANK_UPDATED,
+    WRITE_BATCH_MAX,
+    WRITE_CONFIRM_TIMEOUT,
 )
 
+# Platforms searched when routing a payload key, in order of precedence.
+ROUTED_ENTITY_TYPES = ["sensor", "switch", "number", "time", "time_hhmm", "button", "select"]
+
+# Routing indexes are shared by every coordinator with the same brand and firmware code.
+_ROUTING_INDEXES: dict[tuple[str, str | None], dict[str, str]] = {}
+
+# Derived metrics in evaluation order, shared like the routing indexes.
+_DERIVED_METRICS: dict[tuple[str, str | None], list[DerivedMetric]] = {}
+
+# Register layouts per brand, built once from the entity definitions.
+_REGISTER_LAYOUTS: dict[str, dict[str, list[RegisterField]]] = {}
+
+# Platforms whose entities are holdbank settings that can be written. Entities
+# flagged "momentary" are commands, such as a restart, rather than settings.
+WRITABLE_ENTITY_TYPES = ["number", "switch", "select", "time", "time_hhmm"]
+
+# Writable settings shared like the routing indexes.
+_WRITABLE_SETTINGS: dict[tuple[str, str | None], dict[str, str]] = {}
+
+
+def normalise_key(key: str) -> str:
+    """Turn a raw payload key into the suffix used in entity ids."""
+    return key.lower().replace("-", "_").replace(":", "_")
+
+
+def iter_entities(
+    inverter_brand: str, firmware_code: str | None, entity_types: list[str] | None = None
+) -> Iterator[tuple[str, str, dict[str, Any]]]:
+    """Yield (platform, bank name, definition) of each entity available on a firmware.
+
+    Entity types are walked in the order given, all of them by default.
+    """
+    brand_entities = ENTITIES.get(inverter_brand, {})
+    for entity_type in brand_entities if entity_types is None else entity_types:
+        # time_hhmm entities are exposed through the time platform
+        platform = "time" if entity_type == "time_hhmm" else entity_type
+        for bank_name, entities in brand_entities.get(entity_type, {}).items():
+            for entity in entities:
+                allowed_firmware_codes = entity.get("allowed_firmware_codes", [])
+                if allowed_firmware_codes and firmware_code not in allowed_firmware_codes:
+                    continue
+                yield platform, bank_name, entity
+
+
+def get_routing_index(inverter_brand: str, firmware_code: str | None) -> dict[str, str]:
+    """Return the mapping of lowercase unique_id to entity platform for a brand and firmware."""
+    index_key = (inverter_brand, firmware_code)
+    index = _ROUTING_INDEXES.get(index_key)
+    if index is not None:
+        return index
+
+    index = {}
+    for platform, _, entity in iter_entities(inverter_brand, firmware_code, ROUTED_ENTITY_TYPES):
+        index.setdefault(entity["unique_id"].lower(), platform)
+
+    _ROUTING_INDEXES[index_key] = index
+    return index
+
+
+def get_writable_settings(inverter_brand: str, firmware_code: str | None) -> dict[str, str]:
+    """Return the mapping of lowercase setting name to the unique_id the dongle expects.
+
+    Momentary commands are left out, so snapshots, restores and profiles
+    never restart the inverter or start a quick charge.
+    """
+    settings_key = (inverter_brand, firmware_code)
+    settings = _WRITABLE_SETTINGS.get(settings_key)
+    if settings is not None:
+        return settings
+
+    settings = {}
+    for _, _, entity in iter_entities(inverter_brand, firmware_code, WRITABLE_ENTITY_TYPES):
+        if not entity.get("momentary"):
+            settings.setdefault(entity["unique_id"].lower(), entity["unique_id"])
+
+    _WRITABLE_SETTINGS[settings_key] = settings
+    return settings
+
+
+def get_momentary_commands(inverter_brand: str, firmware_code: str | None) -> set[str]:
+    """Return the lowercase names of writable entities that are commands rather than settings."""
+    return {
+        entity["unique_id"].lower()
+        for _, _, entity in iter_entities(inverter_brand, firmware_code, WRITABLE_ENTITY_TYPES)
+        if entity.get("momentary")
+    }
+
+
+def get_derived_metrics(inverter_brand: str, firmware_code: str | None) -> list[DerivedMetric]:
+    """Return the compiled calculated sensors for a brand and firmware, in dependency order."""
+    metrics_key = (inverter_brand, firmware_code)
+    ordered = _DERIVED_METRICS.get(metrics_key)
+    if ordered is not None:
+        return ordered
+
+    metrics = []
+    for _, _, entity in iter_entities(inverter_brand, firmware_code, ["sensor"]):
+        if "calculation" not in entity:
+            continue
+        try:
+            metrics.append(compile_metric(entity["unique_id"].lower(), entity["calculation"]))
+        except (KeyError, ValueError) as e:
+            LOGGER.error(f"Invalid calculation for {entity['unique_id']}: {e}")
+
+    ordered, cyclic = order_metrics(metrics)
+    if cyclic:
+        LOGGER.error(f"Calculated sensors depend on each other in a cycle: {', '.join(cyclic)}")
+    _DERIVED_METRICS[metrics_key] = ordered
+    return ordered
+
+
+def get_register_layouts(inverter_brand: str) -> dict[str, list[RegisterField]]:
+    """Return the register layout of each bank for a brand."""
+    layouts = _REGISTER_LAYOUTS.get(inverter_brand)
+    if layouts is None:
+        layouts = build_register_layouts(ENTITIES.get(inverter_brand, {}))
+        _REGISTER_LAYOUTS[inverter_brand] = layouts
+    return layouts
+
+
+class TopicRoute(NamedTuple):
+    """How to handle messages on one dongle topic suffix."""
+
+    # None marks topics we publish ourselves and ignore when they echo back
+    handler: Callable[[Any], Awaitable[None] | None] | None
+    bank_name: str | None = None
+    # Immediate handlers are callbacks given the raw payload straight from
+    # the MQTT callback, skipping the ingest queue
+    immediate: bool = False
+
+
+class PendingWrite:
+    """A written setting waiting for a holdbank to read it back."""
+
+    __slots__ = ("value", "confirmed", "answered")
+
+    def __init__(self, value: Any, confirmed: asyncio.Future) -> None:
+        self.value = value
+        # True when a readback matches, False when one disagrees, None if superseded
+        self.confirmed = confirmed
+        # Banks read before the command is answered may predate it
+        self.answered = False
+
+
+def readback_matches(expected: Any, actual: Any) -> bool:
+    """Compare a written value with the one a bank reports for it."""
+    try:
+        return abs(float(expected) - float(actual)) < 1e-6
+    except (TypeError, ValueError):
+        pass
+    if isinstance(expected, str) and isinstance(actual, str):
+        # Times are written as HH:MM:SS but may be reported as HH:MM
+        expected_time = dt_util.parse_time(expected)
+        if expected_time is not None:
+            return expected_time == dt_util.parse_time(actual)
+    return expected == actual
+
+
 class MonitorMySolar(DataUpdateCoordinator[None]):
 
     def __init__(
@@ -38,8 +224,78 @@ class MonitorMySolar(DataUpdateCoordinator[None]):
         self.current_fw_version: str = ""
         self.current_ui_version: str = ""
         self.server_versions = {}
-        self.entities = {}
+        self.entities = StateStore()
+        self._routing_index: dict[str, str] = {}
+        self._key_routes: dict[str, int] = {}
+        # Register layouts with each key already resolved to its slot
+        self._register_slots: dict[str, list[tuple[int, int, float | None, bool, int, int, bool]]] = {}
+        self._entity_listeners: dict[int, list[CALLBACK_TYPE]] = {}
+        # Calculated sensors as (metric, input name -> slot, input slots, output slot)
+        self._derived: list[tuple[DerivedMetric, dict[str, int], frozenset[int], int]] = []
+        # Input slots of each calculated slot, in dependency order
+        self._derived_inputs: dict[int, frozenset[int]] = {}
+        self.derived_attributes: dict[int, dict[str, Any]] = {}
+        self._changed_slots: set[int] = set()
+        self.decode_payload = decode_json
+        self.payload_encoding = ENCODING_JSON
+        self._coalesce_window: float = entry.options.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW) / 1000
+        self._pending_since: float | None = None
+        self._pending_messages = 0
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        self.coalesce_stats = {"flushes": 0, "messages": 0, "max_merged": 0, "peak_merged": 0}
+        self._diagnostics_published = 0.0
+        # Messages waiting for the ingest consumer, keyed by bank so a newer
+        # snapshot replaces an older one that has not been processed yet
+        self._ingest_queue: dict[Any, tuple[TopicRoute, str, bytes, float, float]] = {}
+        self._ingest_ready = asyncio.Event()
+        self.ingest_stats = {"peak_depth": 0, "dropped": 0, "superseded": 0, "peak_lag_ms": 0.0, "max_lag_ms": 0.0}
         self._dongle_id: str = cast(str, self.entry.data["dongle_id"])
+        self._topic_prefix = f"{self._dongle_id}/"
+        self._topic_routes: dict[str, TopicRoute] = {}
+        self._bank_fingerprints: dict[str, tuple[int, int]] = {}
+        self.bank_signal = SIGNAL_BANK_UPDATED.format(self.dongle_id)
+        # Wall clock receive time of the message being processed
+        self._received_time = 0.0
+        # Bank watchdog: last arrival and learned interval per bank, the
+        # slots each bank writes, and one timer for the earliest deadline
+        self._bank_last_seen: dict[str, float] = {}
+        self._bank_cadence: dict[str, float] = {}
+        self._bank_slots: dict[str, set[int]] = {}
+        self._slot_banks: dict[int, str] = {}
+        # Banks only seeded at setup, whose first arrival says nothing about their cadence
+        self._unseen_banks: set[str] = set()
+        self.stale_banks: set[str] = set()
+        self._unsub_watchdog: CALLBACK_TYPE | None = None
+        self._watchdog_deadline: float | None = None
+        # Last sequence number merged per bank, and when banks waiting on a
+        # resync last asked for it
+        self._bank_sequences: dict[str, int] = {}
+        self._resync_pending: dict[str, float] = {}
+        # Written settings by slot until a holdbank confirms or contradicts them
+        self._pending_writes: dict[int, PendingWrite] = {}
+
+        self.register_topic_handler("firmwarecode/response", self.process_firmware_code_message)
+        self.register_topic_handler("firmwarecode/request", None)
+        self.register_topic_handler("capabilities/response", self.process_capabilities_message)
+        self.register_topic_handler("capabilities/request", None)
+        self.register_topic_handler("response", self._async_handle_response, immediate=True)
+        self.register_topic_handler("status", self.process_status_message)
+        self.register_topic_handler("update", None)
+        register_layouts = get_register_layouts(self.inverter_brand)
+        for bank_name in INPUT_BANKS + HOLD_BANKS:
+            self.register_bank_topic(bank_name)
+            if bank_name in register_layouts:
+                self.register_topic_handler(
+                    f"{bank_name}/raw", partial(self.process_register_message, bank_name), bank_name
+                )
+            else:
+                # Without a layout the registers can't be read, the dongle also sends the JSON bank
+                self.register_topic_handler(f"{bank_name}/raw", None)
+            # Deltas build on each other so they are never replaced in the ingest queue
+            self.register_topic_handler(
+                f"{bank_name}/delta", partial(self.process_message, bank_name, delta_topic=True)
+            )
+            self.register_topic_handler(f"{bank_name}/request", None)
 
         super().__init__(
             hass,
@@ -63,32 +319,353 @@ class MonitorMySolar(DataUpdateCoordinator[None]):
         """Firmware code of the inverter."""
         return self._firmware_code
 
+    def register_topic_handler(
+        self,
+        suffix: str,
+        handler: Callable[[Any], Awaitable[None] | None] | None,
+        bank_name: str | None = None,
+        immediate: bool = False,
+    ) -> None:
+        """Route decoded messages on {dongle_id}/{suffix} to a handler."""
+        self._topic_routes[suffix] = TopicRoute(handler, bank_name, immediate)
+
+    def register_bank_topic(self, bank_name: str, suffix: str | None = None) -> None:
+        """Route a bank topic to process_message with its bank name already parsed."""
+        self.register_topic_handler(
+            suffix or bank_name, partial(self.process_message, bank_name), bank_name
+        )
+
+    def _route_topic(self, topic: str) -> TopicRoute:
+        """Find the route for a topic, treating unknown suffixes as banks."""
+        suffix = topic[len(self._topic_prefix):] if topic.startswith(self._topic_prefix) else topic
+        route = self._topic_routes.get(suffix)
+        if route is None:
+            bank_name = suffix.split('/')[-1]
+            LOGGER.debug(f"Routing unknown topic {topic} as bank {bank_name}")
+            self.register_bank_topic(bank_name, suffix)
+            route = self._topic_routes[suffix]
+        return route
+
+    @callback
+    def _async_handle_mqtt_message(self, msg) -> None:
+        """Queue a message for the ingest consumer."""
+        route = self._route_topic(msg.topic)
+        if route.handler is None or is_empty(msg.payload):
+            return
+        if route.immediate:
+            route.handler(msg.payload)
+            return
+
+        queue = self._ingest_queue
+        stats = self.ingest_stats
+        # Banks are latest-wins; anything else is never replaced
+        key = route.bank_name if route.bank_name is not None else object()
+        if key in queue:
+            stats["superseded"] += 1
+        elif len(queue) >= INGEST_QUEUE_SIZE:
+            stats["dropped"] += 1
+            LOGGER.debug(f"Ingest queue full, dropping message on {msg.topic}")
+            return
+        queue[key] = (route, msg.topic, msg.payload, time.monotonic(), time.time())
+        stats["peak_depth"] = max(stats["peak_depth"], len(queue))
+        self._ingest_ready.set()
+
+    async def _async_consume_ingest_queue(self) -> None:
+        """Process queued messages one at a time, oldest bank first."""
+        queue = self._ingest_queue
+        stats = self.ingest_stats
+        while True:
+            await self._ingest_ready.wait()
+            self._ingest_ready.clear()
+            while queue:
+                route, topic, payload, received_at, self._received_time = queue.pop(next(iter(queue)))
+                lag_ms = (time.monotonic() - received_at) * 1000
+                stats["peak_lag_ms"] = max(stats["peak_lag_ms"], lag_ms)
+                try:
+                    await self._async_process_payload(route, topic, payload)
+                except Exception:  # keep the consumer alive for the next message
+                    LOGGER.exception(f"Error processing message on {topic}")
+
+    async def _async_process_payload(self, route: TopicRoute, topic: str, payload: bytes) -> None:
+        """Decode a message once and hand it to the handler for its topic."""
+        if route.bank_name is not None:
+            # The dongle republishes unchanged banks (mostly holdbanks) every
+            # cycle; an identical payload only needs its arrival recorded.
+            # While writes are pending the repeat may be the readback they wait for.
+            fingerprint = (len(payload), hash(payload))
+            if self._bank_fingerprints.get(route.bank_name) == fingerprint and not self._pending_writes:
+                self._async_bank_seen(route.bank_name)
+                return
+            self._bank_fingerprints[route.bank_name] = fingerprint
+        try:
+            data = self.decode_payload(payload)
+        except ValueError:
+            LOGGER.error(f"Invalid {self.payload_encoding} payload received on {topic}")
+            return
+
+        await route.handler(data)
+        self._async_schedule_flush()
+
+    @callback
+    def _async_schedule_flush(self) -> None:
+        """Hold changes back for the coalescing window so a burst of banks dispatches once."""
+        self._pending_messages += 1
+        if not self._coalesce_window:
+            self._async_flush()
+            return
+
+        now = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = now
+        # Each message restarts the window, but never past the hard cap
+        delay = min(self._coalesce_window, self._pending_since + COALESCE_MAX_DELAY - now)
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+        self._unsub_flush = async_call_later(self.hass, max(delay, 0), self._async_flush)
+
+    def bank_timeout(self, bank_name: str) -> float:
+        """Return how long a bank may be silent before it is considered stale."""
+        cadence = self._bank_cadence.get(bank_name)
+        if cadence is None:
+            return BANK_STALE_DEFAULT_TIMEOUT
+        return max(BANK_STALE_MIN_TIMEOUT, cadence * BANK_STALE_FACTOR)
+
+    def slot_available(self, slot: int) -> bool:
+        """Return False if the bank that writes a slot, or any a calculated slot depends on, has gone stale."""
+        if not self.stale_banks:
+            return True
+        bank_name = self._slot_banks.get(slot)
+        if bank_name is not None:
+            return bank_name not in self.stale_banks
+        return all(self.slot_available(input_slot) for input_slot in self._derived_inputs.get(slot, ()))
+
+    def _bank_dependents(self, bank_name: str) -> set[int]:
+        """Return the slots a bank writes and the calculated slots derived from them."""
+        slots = set(self._bank_slots.get(bank_name, ()))
+        for output_slot, input_slots in self._derived_inputs.items():
+            if not input_slots.isdisjoint(slots):
+                slots.add(output_slot)
+        return slots
+
+    def _add_bank_slot(self, bank_name: str, slot: int) -> None:
+        """Record that a bank writes a slot, so its entities follow the bank's availability."""
+        self._bank_slots.setdefault(bank_name, set()).add(slot)
+        self._slot_banks[slot] = bank_name
+
+    @callback
+    def _async_track_bank(self, bank_name: str) -> None:
+        """Learn a bank's cadence from its arrivals and keep the watchdog armed."""
+        now = time.monotonic()
+        last_seen = self._bank_last_seen.get(bank_name)
+        self._bank_last_seen[bank_name] = now
+        if bank_name in self._unseen_banks:
+            # The seed is when we started waiting, not a previous arrival
+            self._unseen_banks.discard(bank_name)
+            last_seen = None
+        if bank_name in self.stale_banks:
+            # The gap was an outage, not the bank's normal cadence
+            self.stale_banks.discard(bank_name)
+            LOGGER.info(f"{bank_name} from {self._dongle_id} is back")
+            self._changed_slots.update(self._bank_dependents(bank_name))
+            self._async_schedule_flush()
+        elif last_seen is not None:
+            interval = now - last_seen
+            cadence = self._bank_cadence.get(bank_name)
+            self._bank_cadence[bank_name] = (
+                interval if cadence is None else cadence + BANK_CADENCE_SMOOTHING * (interval - cadence)
+            )
+
+        deadline = now + self.bank_timeout(bank_name)
+        if self._watchdog_deadline is None or deadline < self._watchdog_deadline:
+            self._async_schedule_watchdog(deadline)
+
+    @callback
+    def _async_schedule_watchdog(self, deadline: float) -> None:
+        """Run the watchdog at a deadline, replacing any earlier schedule."""
+        self._async_cancel_watchdog()
+        self._watchdog_deadline = deadline
+        self._unsub_watchdog = async_call_later(
+            self.hass, max(deadline - time.monotonic(), 0), self._async_check_banks
+        )
+
+    @callback
+    def _async_cancel_watchdog(self) -> None:
+        """Cancel the watchdog timer."""
+        if self._unsub_watchdog is not None:
+            self._unsub_watchdog()
+            self._unsub_watchdog = None
+        self._watchdog_deadline = None
+
+    @callback
+    def _async_check_banks(self, _now: Any = None) -> None:
+        """Mark banks that missed their deadline stale and wake only their entities."""
+        self._unsub_watchdog = None
+        self._watchdog_deadline = None
+        now = time.monotonic()
+        next_deadline = None
+        for bank_name, last_seen in self._bank_last_seen.items():
+            if bank_name in self.stale_banks:
+                continue
+            deadline = last_seen + self.bank_timeout(bank_name)
+            if deadline <= now:
+                LOGGER.warning(f"No {bank_name} from {self._dongle_id} for {now - last_seen:.0f}s, marking it unavailable")
+                self.stale_banks.add(bank_name)
+                self._changed_slots.update(self._bank_dependents(bank_name))
+            elif next_deadline is None or deadline < next_deadline:
+                next_deadline = deadline
+        if next_deadline is not None:
+            self._async_schedule_watchdog(next_deadline)
+        self._async_dispatch_changes()
+
+    @callback
+    def _async_cancel_flush(self) -> None:
+        """Cancel a scheduled flush."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+
+    @callback
+    def _async_flush(self, _now: Any = None) -> None:
+        """Dispatch everything that changed since the last flush."""
+        self._unsub_flush = None
+        self._pending_since = None
+        merged = self._pending_messages
+        self._pending_messages = 0
+        if merged:
+            stats = self.coalesce_stats
+            stats["flushes"] += 1
+            stats["messages"] += merged
+            stats["max_merged"] = max(stats["max_merged"], merged)
+            stats["peak_merged"] = max(stats["peak_merged"], merged)
+            # Diagnostics change with every flush, so they are only recorded now and then
+            now = time.monotonic()
+            if now - self._diagnostics_published >= DIAGNOSTIC_PUBLISH_INTERVAL:
+                self._diagnostics_published = now
+                self._set_entity_value(f"sensor.{self.dongle_id}_coalesced_messages", {
+                    "value": stats["peak_merged"],
+                    "flushes": stats["flushes"],
+                    "messages": stats["messages"],
+                    "max_merged": stats["max_merged"],
+                    "average_merged": round(stats["messages"] / stats["flushes"], 2),
+                })
+                stats["peak_merged"] = 0
+                self._publish_ingest_stats()
+                self._publish_command_stats()
+        self._evaluate_derived()
+        self._async_dispatch_changes()
+
+    def _publish_ingest_stats(self) -> None:
+        """Expose ingest queue statistics since the last flush to the diagnostic sensors."""
+        stats = self.ingest_stats
+        stats["max_lag_ms"] = max(stats["max_lag_ms"], stats["peak_lag_ms"])
+        self._set_entity_value(f"sensor.{self.dongle_id}_ingest_queue_depth", {
+            "value": stats["peak_depth"],
+            "limit": INGEST_QUEUE_SIZE,
+        })
+        self._set_entity_value(f"sensor.{self.dongle_id}_ingest_dropped", {
+            "value": stats["dropped"] + stats["superseded"],
+            "dropped": stats["dropped"],
+            "superseded": stats["superseded"],
+        })
+        self._set_entity_value(f"sensor.{self.dongle_id}_ingest_lag", {
+            "value": round(stats["peak_lag_ms"], 1),
+            "max_lag_ms": round(stats["max_lag_ms"], 1),
+        })
+        stats["peak_depth"] = len(self._ingest_queue)
+        stats["peak_lag_ms"] = 0.0
+
+    def _publish_command_stats(self) -> None:
+        """Expose how long commands of each priority class waited to be sent."""
+        scheduler = self.mqtt_handler.scheduler
+        for priority, stats in scheduler.wait_stats.items():
+            self._set_entity_value(f"sensor.{self.dongle_id}_command_wait_{priority.name.lower()}", {
+                "value": round(stats["peak_wait_ms"], 1),
+                "max_wait_ms": round(stats["max_wait_ms"], 1),
+                "commands": stats["commands"],
+                "queued": scheduler.queued(priority),
+            })
+            stats["peak_wait_ms"] = 0.0
+
+    @callback
+    def _async_handle_response(self, payload: bytes) -> None:
+        """Hand a command response to the MQTT handler's pending commands.
+
+        Responses skip the ingest queue so a burst of banks can neither delay
+        nor drop them.
+        """
+        try:
+            data = self.decode_payload(payload)
+        except ValueError:
+            LOGGER.error(f"Invalid {self.payload_encoding} response received: {payload}")
+            # Without an id we can only fail the oldest command
+            data = None
+        self.mqtt_handler.async_response_received(data)
+
     @callback
-    async def _async_handle_mqtt_message(self, msg) -> None:
-        """Manually update data and notify listeners."""
-        if msg.topic == f"{self._dongle_id}/firmwarecode/response":
-            LOGGER.debug("Received firmware code response")
+    def async_add_listener(self, update_callback: CALLBACK_TYPE, context: Any = None) -> CALLBACK_TYPE:
+        """Listen for changes to the entity ids given as context, or for every update."""
+        if not isinstance(context, tuple):
+            return super().async_add_listener(update_callback, context)
+
+        slots = [self.entities.slot(entity_id) for entity_id in context]
+        for slot in slots:
+            self._entity_listeners.setdefault(slot, []).append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the entity listener."""
+            for slot in slots:
+                listeners = self._entity_listeners.get(slot)
+                if listeners and update_callback in listeners:
+                    listeners.remove(update_callback)
+                if not listeners:
+                    self._entity_listeners.pop(slot, None)
+
+        return remove_listener
+
+    def _set_entity_value(self, entity_id: str, value: Any) -> None:
+        """Store a value and remember the entity if it changed."""
+        slot = self.entities.slot(entity_id)
+        if self.entities.set_slot(slot, value):
+            self._changed_slots.add(slot)
+
+    def _evaluate_derived(self) -> None:
+        """Recalculate the calculated sensors whose inputs changed since the last flush."""
+        store = self.entities
+        changed_slots = self._changed_slots
+        for metric, input_slots, slots, output_slot in self._derived:
+            # Metrics are in dependency order so chained outputs are already in changed_slots
+            if slots.isdisjoint(changed_slots):
+                continue
+            values = {}
+            for name, slot in input_slots.items():
+                value = store.get_slot(slot)
+                values[name] = 0 if value is None else value
             try:
-                data = json.loads(msg.payload)
-                firmware_code = data.get("FWCode")
-                if firmware_code:
-                    self._firmware_code = firmware_code
-                    LOGGER.debug(f"Firmware code received: {self.firmware_code}")
-                    self.hass.config_entries.async_update_entry(
-                        self.entry, data={**self.entry.data, "firmware_code": firmware_code}
-                    )
-                    await self.hass.config_entries.async_forward_entry_setups(self.entry, PLATFORMS)
-                else:
-                    LOGGER.error("No firmware code found in response")
-            except json.JSONDecodeError:
-                LOGGER.error("Failed to decode JSON from response")
-        elif msg.topic == f"{self._dongle_id}/response":
-            await self.mqtt_handler.response_received(msg)
-        elif msg.topic == f"{self._dongle_id}/status":
-            await self.process_status_message(msg.payload)
-        else:
-            await self.process_message(msg.topic, msg.payload)
-        self.async_set_updated_data(self.entities)
+                state, attributes = metric.evaluate(values)
+            except (ArithmeticError, TypeError, ValueError) as e:
+                LOGGER.debug(f"Could not calculate {metric.key}: {e}")
+                state, attributes = None, {}
+            if store.set_slot(output_slot, state) or attributes != self.derived_attributes.get(output_slot):
+                self.derived_attributes[output_slot] = attributes
+                changed_slots.add(output_slot)
+
+    @callback
+    def _async_dispatch_changes(self) -> None:
+        """Notify only the entities whose values changed since the last dispatch."""
+        changed = self._changed_slots
+        if not changed:
+            return
+        self._changed_slots = set()
+
+        # An entity depending on several changed values is only woken once
+        update_callbacks: dict[CALLBACK_TYPE, None] = {}
+        for slot in changed:
+            for update_callback in self._entity_listeners.get(slot, ()):
+                update_callbacks[update_callback] = None
+        for update_callback in update_callbacks:
+            update_callback()
+        self.async_update_listeners()
 
     @callback
     async def async_setup(self):
@@ -107,7 +684,16 @@ class MonitorMySolar(DataUpdateCoordinator[None]):
             for typeName, entities in entityTypes.items():
                 for entity in entities:
                     entity_id: str = f"{entityTypeName}.{self.dongle_id}_{entity['unique_id'].lower()}"
-                    self.entities[entity_id] = None
+                    self.entities.slot(entity_id)
+
+        self._build_routing_index()
+        # Restored states go unavailable if their banks never arrive
+        now = time.monotonic()
+        for bank_name in INPUT_BANKS + HOLD_BANKS:
+            if bank_name not in self._bank_last_seen:
+                self._bank_last_seen[bank_name] = now
+                self._unseen_banks.add(bank_name)
+        self._async_schedule_watchdog(now + BANK_STALE_DEFAULT_TIMEOUT)
 
         if not self.firmware_code:
             LOGGER.debug("Requesting firmware code...")
@@ -121,18 +707,37 @@ class MonitorMySolar(DataUpdateCoordinator[None]):
             async_call_later(self.hass, 15, firmware_timeout)
         else:
             await self.hass.config_entries.async_forward_entry_setups(self.entry, PLATFORMS)
+
+        # Dongles that don't understand the request never answer and stay on JSON
+        await mqtt.async_publish(
+            self.hass,
+            f"{self._dongle_id}/capabilities/request",
+            json.dumps({"encodings": supported_encodings()}),
+        )
+        self.entry.async_on_unload(self._async_cancel_flush)
+        self.entry.async_on_unload(self._async_cancel_watchdog)
+        self.entry.async_on_unload(self.mqtt_handler.async_cancel_pending)
+        self.entry.async_on_unload(self._async_cancel_writes)
+        self.entry.async_create_background_task(
+            self.hass, self._async_consume_ingest_queue(), f"{DOMAIN} ingest {self.dongle_id}"
+        )
         self.entry.async_on_unload(self.entry.add_update_listener(self.config_entry_update_listener))
-        return await mqtt.async_subscribe(self.hass, f"{self._dongle_id}/#", self._async_handle_mqtt_message)
+        # Subscribe with raw bytes so payloads are decoded exactly once, by us
+        self.entry.async_on_unload(
+            await mqtt.async_subscribe(
+                self.hass, f"{self._dongle_id}/#", self._async_handle_mqtt_message, encoding=None
+            )
+        )
 
     async def _async_update_data(self) -> None:
         """Update data."""
         return self.data
 
-    async def config_entry_update_listener(hass: HomeAssistant, entry: MonitorMySolarEntry) -> None:
+    async def config_entry_update_listener(self, hass: HomeAssistant, entry: MonitorMySolarEntry) -> None:
         """Update listener, called when the config entry options are changed."""
         await hass.config_entries.async_reload(entry.entry_id)
 
-    async def async_unload_entry(hass, entry: MonitorMySolarEntry):
+    async def async_unload_entry(self, hass: HomeAssistant, entry: MonitorMySolarEntry):
         """Unload a config entry."""
         LOGGER.info(f"Unloading Monitor My Solar for {entry.data.get('inverter_brand')}")
         try:
@@ -142,16 +747,37 @@ class MonitorMySolar(DataUpdateCoordinator[None]):
             LOGGER.error(f"Error during unload: {e}")
             return False
 
-    async def process_status_message(self, payload):
-        """Process incoming status MQTT message and update the status sensor."""
-        if payload is None or len(payload.strip()) == 0:
-            return
+    async def process_firmware_code_message(self, data):
+        """Process the firmware code response and set up the platforms."""
+        LOGGER.debug("Received firmware code response")
+        firmware_code = data.get("FWCode") if isinstance(data, dict) else None
+        if firmware_code:
+            self._firmware_code = firmware_code
+            self._build_routing_index()
+            LOGGER.debug(f"Firmware code received: {self.firmware_code}")
+            self.hass.config_entries.async_update_entry(
+                self.entry, data={**self.entry.data, "firmware_code": firmware_code}
+            )
+            await self.hass.config_entries.async_forward_entry_setups(self.entry, PLATFORMS)
+        else:
+            LOGGER.error("No firmware code found in response")
+
+    async def process_capabilities_message(self, data):
+        """Switch to the payload encoding the dongle picked from our capabilities."""
+        encoding = data.get("encoding", ENCODING_JSON) if isinstance(data, dict) else ENCODING_JSON
         try:
-            data = json.loads(payload)
-        except ValueError:
-            LOGGER.error("Invalid JSON payload received for status message")
+            decoder = get_decoder(encoding)
+        except ValueError as e:
+            LOGGER.error(f"Dongle {self._dongle_id} chose an encoding we can't decode: {e}")
             return
+        LOGGER.info(f"Dongle {self._dongle_id} payload encoding: {encoding}")
+        self.payload_encoding = encoding
+        self.decode_payload = decoder
+        # Fingerprints of the old encoding will never match again
+        self._bank_fingerprints.clear()
 
+    async def process_status_message(self, data):
+        """Process a decoded status message and update the status sensor."""
         # Check if the message follows the new structure with 'Serialnumber' and 'payload'
         if "Serialnumber" in data and "payload" in data:
             serial_number = data["Serialnumber"]
@@ -161,20 +787,23 @@ class MonitorMySolar(DataUpdateCoordinator[None]):
             status_data = data  # Old format
 
         entity_id = f"sensor.{self.dongle_id}_uptime"
-        self.entities[entity_id] = status_data
+        self._set_entity_value(entity_id, status_data)
 
-    async def process_message(self, topic, payload):
-        """Process incoming MQTT message and update entity states."""
-        if payload is None or len(payload.strip()) == 0:
-            return
-        try:
-            data = json.loads(payload)
-            bank_name = topic.split('/')[-1]  # Gets 'inputbank1', 'holdbank2', etc.
-            self.hass.bus.async_fire(f"{DOMAIN}_bank_updated", {"bank_name": bank_name})
+    @callback
+    def _async_bank_seen(self, bank_name: str) -> None:
+        """Tell this dongle's listeners that a bank message arrived and when."""
+        self._async_track_bank(bank_name)
+        async_dispatcher_send(
+            self.hass, self.bank_signal, bank_name, dt_util.utc_from_timestamp(self._received_time)
+        )
 
-        except ValueError:
-            LOGGER.error("Invalid JSON payload received")
-            return
+    async def process_message(self, bank_name, data, delta_topic=False):
+        """Process a decoded bank message and update entity states.
+
+        Deltas are only accepted from the {bank}/delta topic, whose messages
+        are never replaced in the ingest queue.
+        """
+        self._async_bank_seen(bank_name)
 
         # Handle new payload structure while maintaining backward compatibility
         serial_number = None
@@ -190,11 +819,26 @@ class MonitorMySolar(DataUpdateCoordinator[None]):
             if "payload" in data:
                 # New format with data wrapper
                 payload_data = data["payload"]
+                if "seq" in data:
+                    # Full keyframe, deltas continue from its seq
+                    self._bank_sequences[bank_name] = data["seq"]
+                    self._resync_pending.pop(bank_name, None)
                 events_data = data.get("events", {})
                 # Get fault and warning data from events object
                 fault_data = events_data.get("fault", {})
                 warning_data = events_data.get("warning", {})
                 # **Add this block to extract and store versions**
+            elif "delta" in data:
+                # Delta format - only the keys that changed since the previous seq
+                if not delta_topic:
+                    LOGGER.warning(f"Ignoring delta for {bank_name} sent on the bank topic instead of {bank_name}/delta")
+                    return
+                if not self._accept_delta(bank_name, data.get("seq")):
+                    return
+                payload_data = data["delta"]
+                events_data = data.get("events", {})
+                fault_data = events_data.get("fault", {})
+                warning_data = events_data.get("warning", {})
             else:
                 # Old format - direct key-value pairs
                 payload_data = data
@@ -203,7 +847,7 @@ class MonitorMySolar(DataUpdateCoordinator[None]):
             self.current_fw_version = fw_version
             # Set entity value
             entity_id = f"update.{self.dongle_id}_firmware_update"
-            self.entities[entity_id] = fw_version
+            self._set_entity_value(entity_id, fw_version)
 
         # Update UI version
         if "UI_VERSION" in payload_data:
@@ -212,7 +856,7 @@ class MonitorMySolar(DataUpdateCoordinator[None]):
             LOGGER.debug(f"Current UI version set: {ui_version}")
             # Set entity value
             entity_id = f"update.{self.dongle_id}_ui_update"
-            self.entities[entity_id] = ui_version
+            self._set_entity_value(entity_id, ui_version)
 
         # Process fault data
         if fault_data:
@@ -221,19 +865,19 @@ class MonitorMySolar(DataUpdateCoordinator[None]):
             entity_id = f"sensor.{self.dongle_id}_fault_status"
 
             if fault_value == 0:
-                self.entities[entity_id] = {
+                self._set_entity_value(entity_id, {
                     "value": 0,
                     "description": None  # This will trigger "No Fault" state
-                }
+                })
             else:
                 descriptions = fault_data.get("descriptions", ["Unknown Fault"])
                 timestamp = fault_data.get("timestamp", "Unknown")
-                self.entities[entity_id] = {
+                self._set_entity_value(entity_id, {
                     "value": fault_value,
                     "description": ", ".join(descriptions),
                     "start_time": timestamp,
                     "end_time": "Ongoing"
-                }
+                })
 
         # Process warning data
         if warning_data:
@@ -242,60 +886,424 @@ class MonitorMySolar(DataUpdateCoordinator[None]):
             entity_id = f"sensor.{self.dongle_id}_warning_status"
 
             if warning_value == 0:
-                self.entities[entity_id] = {
+                self._set_entity_value(entity_id, {
                     "value": 0,
                     "description": None  # This will trigger "No Warning" state
-                }
+                })
             else:
                 descriptions = warning_data.get("descriptions", ["Unknown Warning"])
                 timestamp = warning_data.get("timestamp", "Unknown")
-                self.entities[entity_id] = {
+                self._set_entity_value(entity_id, {
                     "value": warning_value,
                     "description": ", ".join(descriptions),
                     "start_time": timestamp,
                     "end_time": "Ongoing"
-                }
+                })
         # Process main sensor data
-        for entity_id_suffix, state in payload_data.items():
-        # Skip if we've already handled version keys
-            formatted_entity_id_suffix = entity_id_suffix.lower().replace("-", "_").replace(":", "_")
-            entity_type = self.determine_entity_type(formatted_entity_id_suffix)
-            entity_id = f"{entity_type}.{self.dongle_id}_{formatted_entity_id_suffix}"
-            self.entities[entity_id] = state
+        store = self.entities
+        changed_slots = self._changed_slots
+        key_routes = self._key_routes
+        pending_writes = self._pending_writes
+        readback = []
+        for key, state in payload_data.items():
+            slot = key_routes.get(key)
+            if slot is None:
+                slot = self._route_key(key)
+                self._add_bank_slot(bank_name, slot)
+            if store.set_slot(slot, state):
+                changed_slots.add(slot)
+            if pending_writes and slot in pending_writes:
+                readback.append(slot)
+        if readback:
+            self._confirm_writes(readback)
         # Process events data if present (new format)
         if events_data:
             LOGGER.debug(f"Processing events data: {events_data}")
             # Fire events for state updates
             for event_id, event_state in events_data.items():
-                formatted_event_id = event_id.lower().replace("-", "_").replace(":", "_")
+                formatted_event_id = normalise_key(event_id)
                 entity_id = f"binary_sensor.{self.dongle_id}_{formatted_event_id}"
-                self.entities[entity_id] = event_state
+                self._set_entity_value(entity_id, event_state)
+
+    def write_pending(self, slot: int) -> bool:
+        """Return True while a written value for a slot awaits its readback."""
+        return slot in self._pending_writes
+
+    def _setting_slot(self, key: str) -> int:
+        """Return the slot a setting reads back into."""
+        slot = self._key_routes.get(key)
+        if slot is None:
+            slot = self._route_key(key)
+        return slot
+
+    def _track_writes(self, settings: dict[str, Any]) -> list[tuple[int, PendingWrite]]:
+        """Start waiting for the readback of each setting, superseding older writes."""
+        writes = []
+        for key, value in settings.items():
+            slot = self._setting_slot(key)
+            superseded = self._pending_writes.get(slot)
+            if superseded is not None and not superseded.confirmed.done():
+                superseded.confirmed.set_result(None)
+            pending = PendingWrite(value, self.hass.loop.create_future())
+            self._pending_writes[slot] = pending
+            writes.append((slot, pending))
+        return writes
+
+    async def _async_send_writes(
+        self,
+        settings: dict[str, Any],
+        writes: list[tuple[int, PendingWrite]],
+        description: str,
+        priority: CommandPriority,
+    ) -> bool:
+        """Send tracked settings and return whether they were acknowledged."""
+        try:
+            acked = await self.mqtt_handler.queue_update(self.dongle_id, settings, description, priority)
+        except BaseException:
+            self._release_writes(writes)
+            raise
+        for _, pending in writes:
+            pending.answered = True
+        return acked
+
+    async def _async_wait_readback(self, writes: list[tuple[int, PendingWrite]]) -> None:
+        """Wait for sent writes to be read back, leaving unfinished those nothing read within WRITE_CONFIRM_TIMEOUT."""
+        try:
+            await asyncio.wait([pending.confirmed for _, pending in writes], timeout=WRITE_CONFIRM_TIMEOUT)
+        finally:
+            self._release_writes(writes)
+
+    def _release_writes(self, writes: list[tuple[int, PendingWrite]]) -> None:
+        """Stop tracking writes that have not been settled or superseded."""
+        for slot, pending in writes:
+            if self._pending_writes.get(slot) is pending:
+                del self._pending_writes[slot]
+
+    async def async_write_settings(self, entity: Any, settings: dict[str, Any]) -> bool:
+        """Write settings for an entity that already shows them and return whether they were acknowledged.
+
+        The readback is settled in the background: the next holdbank
+        containing a setting confirms it or replaces the entity's state with
+        the inverter's value. The acknowledgement only decides if no holdbank
+        reads the settings back within WRITE_CONFIRM_TIMEOUT.
+        """
+        writes = self._track_writes(settings)
+        # Show the pending overlay
+        entity.async_write_ha_state()
+        acked = await self._async_send_writes(settings, writes, entity.entity_id, entity.write_priority)
+        self.entry.async_create_background_task(
+            self.hass,
+            self._async_settle_writes(entity, writes, acked),
+            f"{DOMAIN} readback {entity.entity_id}",
+        )
+        return acked
+
+    async def _async_settle_writes(
+        self, entity: Any, writes: list[tuple[int, PendingWrite]], acked: bool
+    ) -> None:
+        """Settle an entity's writes once they are read back or WRITE_CONFIRM_TIMEOUT passes."""
+        await self._async_wait_readback(writes)
+        results = [pending.confirmed.result() if pending.confirmed.done() else None for _, pending in writes]
+        if False in results:
+            # The entity already took the bank's value
+            LOGGER.warning(f"{entity.entity_id} did not read back as written, showing the inverter's value")
+            return
+        if all(pending.confirmed.done() for _, pending in writes):
+            return
+        if not acked:
+            LOGGER.error(f"Failed to update state for {entity.entity_id}, reverting state.")
+            entity.revert_state()
+            return
+        # Acknowledged but never read back, keep the written value without the overlay
+        entity.async_write_ha_state()
+
+    async def async_apply_profile(
+        self, name: str, profile: dict[str, Any], priority: CommandPriority = CommandPriority.INTERACTIVE
+    ) -> dict[str, Any]:
+        """Write the settings of a profile that differ from the holdbanks as one batch.
+
+        Each setting is confirmed by readback. If any is rejected, the ones
+        that were applied are written back to the values they had before and
+        HomeAssistantError is raised. Momentary commands such as a restart
+        are rejected, since a rollback would send them again.
+        """
+        momentary = get_momentary_commands(self.inverter_brand, self.firmware_code)
+        commands = [key for key in profile if key.lower() in momentary]
+        if commands:
+            raise ServiceValidationError(
+                f"Commands can't be part of a profile, only settings: {', '.join(commands)}"
+            )
+        writable = get_writable_settings(self.inverter_brand, self.firmware_code)
+        unknown = [key for key in profile if key.lower() not in writable]
+        if unknown:
+            raise ServiceValidationError(f"Settings that can't be written: {', '.join(unknown)}")
+
+        changes, current_values, unchanged = self._diff_settings(profile, writable)
+        result = {"profile": name, "changed": list(changes), "unchanged": unchanged}
+        if not changes:
+            return result
+
+        LOGGER.info(f"Applying profile {name} to {self._dongle_id}: {changes}")
+        applied, failed = await self._async_write_batch(changes, f"profile {name}", priority)
+        if not failed:
+            return result
+
+        rollback = {setting: current_values[setting] for setting in applied if current_values[setting] is not None}
+        if rollback:
+            LOGGER.warning(f"Profile {name} failed for {', '.join(failed)}, rolling back {', '.join(rollback)}")
+            _, rollback_failed = await self._async_write_batch(rollback, f"profile {name} rollback", priority)
+            if rollback_failed:
+                LOGGER.error(f"Could not roll back {', '.join(rollback_failed)} after profile {name}")
+        raise HomeAssistantError(
+            f"Profile {name} was not applied: {', '.join(failed)} did not read back as written"
+        )
+
+    def settings_snapshot(self) -> dict[str, Any]:
+        """Return every writable setting with its last holdbank value."""
+        store = self.entities
+        settings = {}
+        for setting in get_writable_settings(self.inverter_brand, self.firmware_code).values():
+            value = store.get_slot(self._setting_slot(setting))
+            if value is not None:
+                settings[setting] = value
+        return settings
+
+    async def async_restore_settings(
+        self, name: str, settings: dict[str, Any], progress: Callable[[int, int, list[str]], None]
+    ) -> dict[str, Any]:
+        """Write back the settings of a snapshot that differ from the holdbanks.
+
+        Settings go out in batches of WRITE_BATCH_MAX, with the MQTT handler
+        limiting how many are in flight. progress is called with the number
+        of settings done, the total and those that failed so far after each
+        batch settles. Unlike a profile, a partial restore is kept.
+        """
+        writable = get_writable_settings(self.inverter_brand, self.firmware_code)
+        skipped = [key for key in settings if key.lower() not in writable]
+        changes, _, unchanged = self._diff_settings(
+            {key: value for key, value in settings.items() if key.lower() in writable}, writable
+        )
+        result = {"snapshot": name, "changed": list(changes), "unchanged": unchanged, "skipped": skipped, "failed": []}
+        if not changes:
+            return result
+
+        LOGGER.info(f"Restoring {len(changes)} settings from snapshot {name} to {self._dongle_id}")
+        keys = list(changes)
+        batches = [
+            self._async_write_batch(
+                {key: changes[key] for key in keys[start:start + WRITE_BATCH_MAX]},
+                f"snapshot {name} restore",
+                CommandPriority.BACKGROUND,
+            )
+            for start in range(0, len(keys), WRITE_BATCH_MAX)
+        ]
+        done = 0
+        progress(done, len(keys), result["failed"])
+        for batch in asyncio.as_completed(batches):
+            applied, failed = await batch
+            done += len(applied) + len(failed)
+            result["failed"].extend(failed)
+            progress(done, len(keys), result["failed"])
+        return result
+
+    def _diff_settings(
+        self, settings: dict[str, Any], writable: dict[str, str]
+    ) -> tuple[dict[str, Any], dict[str, Any], list[str]]:
+        """Split settings into those that differ from the holdbanks, their current values, and those that match."""
+        store = self.entities
+        changes: dict[str, Any] = {}
+        current_values: dict[str, Any] = {}
+        unchanged = []
+        for key, value in settings.items():
+            setting = writable[key.lower()]
+            current = store.get_slot(self._setting_slot(setting))
+            if current is not None and readback_matches(value, current):
+                unchanged.append(setting)
+            else:
+                changes[setting] = value
+                current_values[setting] = current
+        return changes, current_values, unchanged
+
+    async def _async_write_batch(
+        self, settings: dict[str, Any], description: str, priority: CommandPriority
+    ) -> tuple[list[str], list[str]]:
+        """Write settings no entity is showing yet and return those applied and those that failed."""
+        writes = self._track_writes(settings)
+        slots = [slot for slot, _ in writes]
+        # Show the pending overlay on the affected entities
+        self._changed_slots.update(slots)
+        self._async_dispatch_changes()
+        acked = await self._async_send_writes(settings, writes, description, priority)
+        await self._async_wait_readback(writes)
+
+        applied, failed = [], []
+        for setting, (_, pending) in zip(settings, writes):
+            if not pending.confirmed.done():
+                # Nothing read it back, so the acknowledgement decides
+                (applied if acked else failed).append(setting)
+            elif pending.confirmed.result() is True:
+                applied.append(setting)
+            elif pending.confirmed.result() is False:
+                failed.append(setting)
+        # Clear the overlay of writes that were never read back
+        self._changed_slots.update(slots)
+        self._async_dispatch_changes()
+        return applied, failed
+
+    def _confirm_writes(self, slots: list[int]) -> None:
+        """Settle the pending writes of slots a bank just reported."""
+        store = self.entities
+        for slot in slots:
+            pending = self._pending_writes[slot]
+            if readback_matches(pending.value, store.get_slot(slot)):
+                pending.confirmed.set_result(True)
+            elif pending.answered:
+                pending.confirmed.set_result(False)
+            else:
+                # Keep showing the written value until a later bank settles it
+                self._changed_slots.discard(slot)
+                continue
+            del self._pending_writes[slot]
+            # Redraw the entity without the overlay, with the bank's value
+            self._changed_slots.add(slot)
+
+    @callback
+    def _async_cancel_writes(self) -> None:
+        """Stop waiting for readbacks."""
+        for pending in self._pending_writes.values():
+            if not pending.confirmed.done():
+                pending.confirmed.set_result(None)
+        self._pending_writes.clear()
+
+    def _accept_delta(self, bank_name: str, seq: int | None) -> bool:
+        """Check a delta's sequence number and request a resync if any were missed."""
+        if seq is None:
+            LOGGER.warning(f"Delta for {bank_name} has no sequence number")
+            self._async_request_resync(bank_name)
+            return True
+        if bank_name in self._resync_pending:
+            # Ask again if the request or its keyframe was lost
+            self._async_request_resync(bank_name)
+        last_seq = self._bank_sequences.get(bank_name)
+        if last_seq is not None:
+            step = (seq - last_seq) % DELTA_SEQUENCE_MODULO
+            if step == 0 or step > DELTA_SEQUENCE_MODULO // 2:
+                LOGGER.debug(f"Ignoring stale delta {seq} for {bank_name}, already at {last_seq}")
+                return False
+            if step > 1:
+                LOGGER.debug(f"Missed {step - 1} deltas for {bank_name} before {seq}")
+                self._async_request_resync(bank_name)
+        else:
+            self._async_request_resync(bank_name)
+        # Changed keys are still current, so merge them while the keyframe is on its way
+        self._bank_sequences[bank_name] = seq
+        return True
+
+    @callback
+    def _async_request_resync(self, bank_name: str) -> None:
+        """Ask the dongle for a full keyframe of a bank, unless one was asked for recently."""
+        now = time.monotonic()
+        requested = self._resync_pending.get(bank_name)
+        if requested is not None and now - requested < RESYNC_TIMEOUT:
+            return
+        self._resync_pending[bank_name] = now
+        LOGGER.info(f"Requesting full {bank_name} from {self._dongle_id}")
+        self.entry.async_create_task(
+            self.hass,
+            mqtt.async_publish(
+                self.hass,
+                f"{self._dongle_id}/{bank_name}/request",
+                json.dumps({"seq": self._bank_sequences.get(bank_name)}),
+            ),
+        )
+
+    async def process_register_message(self, bank_name, data):
+        """Process a bank sent as a blob of 16-bit registers."""
+        self._async_bank_seen(bank_name)
+        try:
+            registers = unpack_registers(data) if isinstance(data, dict) else None
+        except ValueError as e:
+            LOGGER.error(f"Failed to decode registers for {bank_name}: {e}")
+            return
+        if registers is None:
+            LOGGER.error(f"Unexpected register message for {bank_name}: {data}")
+            return
+
+        layout = self._register_slots.get(bank_name)
+        if layout is None:
+            layout = self._compile_register_layout(bank_name)
+        store = self.entities
+        changed_slots = self._changed_slots
+        pending_writes = self._pending_writes
+        readback = []
+        count = len(registers)
+        for slot, offset, scale, signed, shift, mask, power_factor in layout:
+            if offset >= count:
+                continue
+            value = (registers[offset] >> shift) & mask
+            if signed and value >= 0x8000:
+                value -= 0x10000
+            elif power_factor and value > 1000:
+                # A leading power factor is sent as 1000 plus its magnitude
+                value = 1000 - value
+            if scale is not None:
+                value = round(value * scale, 4)
+            if store.set_slot(slot, value):
+                changed_slots.add(slot)
+            if pending_writes and slot in pending_writes:
+                readback.append(slot)
+        if readback:
+            self._confirm_writes(readback)
+
+    def _compile_register_layout(self, bank_name: str) -> list[tuple[int, int, float | None, bool, int, int, bool]]:
+        """Resolve the register layout of a bank to entity slots."""
+        layout = [
+            (self._route_key(field.key), *field[1:])
+            for field in get_register_layouts(self.inverter_brand).get(bank_name, [])
+        ]
+        if not layout:
+            LOGGER.warning(f"No register layout known for {bank_name}")
+        for slot, *_ in layout:
+            self._add_bank_slot(bank_name, slot)
+        self._register_slots[bank_name] = layout
+        return layout
+
+    def _build_routing_index(self) -> None:
+        """Load the routing index for the current brand and firmware code."""
+        self._routing_index = get_routing_index(self.inverter_brand, self.firmware_code)
+        self._key_routes = {}
+        self._register_slots = {}
+        self._derived = []
+        self._derived_inputs = {}
+        for metric in get_derived_metrics(self.inverter_brand, self.firmware_code):
+            input_slots = {name: self._route_key(name) for name in metric.inputs}
+            slots = frozenset(input_slots.values())
+            output_slot = self._route_key(metric.key)
+            self._derived.append((metric, input_slots, slots, output_slot))
+            self._derived_inputs[output_slot] = slots
+        self._map_bank_slots()
+
+    def _map_bank_slots(self) -> None:
+        """Link the slot of every entity defined under a bank to it, before any bank arrives."""
+        for platform, bank_name, entity in iter_entities(self.inverter_brand, self.firmware_code):
+            if bank_name in INPUT_BANKS or bank_name in HOLD_BANKS:
+                slot = self.entities.slot(f"{platform}.{self.dongle_id}_{entity['unique_id'].lower()}")
+                self._add_bank_slot(bank_name, slot)
+
+    def _route_key(self, key: str) -> int:
+        """Resolve a raw payload key to its entity's slot and cache the result."""
+        formatted_key = normalise_key(key)
+        entity_type = self.determine_entity_type(formatted_key)
+        slot = self.entities.slot(f"{entity_type}.{self.dongle_id}_{formatted_key}")
+        self._key_routes[key] = slot
+        return slot
 
     def determine_entity_type(self, entity_id_suffix):
         """Determine the entity type based on the entity_id_suffix."""
-        brand_entities = ENTITIES.get(self.inverter_brand, {})
-        if not brand_entities:
-            LOGGER.debug(f"No entities defined for inverter brand: {self.inverter_brand}. Defaulting to 'sensor'.")
+        entity_type = self._routing_index.get(entity_id_suffix.lower())
+        if entity_type is None:
+            LOGGER.debug(f"Could not match entity_id_suffix '{entity_id_suffix.lower()}'. Defaulting to 'sensor'.")
             return "sensor"
-
-        entity_id_suffix_lower = entity_id_suffix.lower()
-        #LOGGER.debug(f"Looking for entity_id_suffix '{entity_id_suffix_lower}' in brand '{self.inverter_brand}'.")
-
-        for entity_type in ["sensor", "switch", "number", "time", "time_hhmm", "button", "select"]:
-            if entity_type in brand_entities:
-                for bank_name, entities in brand_entities[entity_type].items():
-                    #LOGGER.debug(f"Checking in bank '{bank_name}' for entity_type '{entity_type}'.")
-                    for entity in entities:
-                        unique_id_lower = entity["unique_id"].lower()
-                        # LOGGER.debug(f"Comparing with unique_id '{unique_id_lower}' for entity_type '{entity_type}'.")
-                        if unique_id_lower == entity_id_suffix_lower:
-                            if entity_type == "time_hhmm":
-                                #LOGGER.debug(f"Matched entity_id_suffix '{entity_id_suffix_lower}' to entity type 'time'.")
-                                return "time"
-                            #LOGGER.debug(f"Matched entity_id_suffix '{entity_id_suffix_lower}' to entity type '{entity_type}'.")
-                            return entity_type
-
-        LOGGER.debug(f"Could not match entity_id_suffix '{entity_id_suffix_lower}'. Defaulting to 'sensor'.")
-        return "sensor"
+        return entity_type
 
 type MonitorMySolarEntry = ConfigEntry[MonitorMySolar]
\ No newline at end of file
@@ -1,16 +1,137 @@
 """Base MonitorMySolar entity."""
 from __future__ import annotations
 
-from homeassistant.core import callback
+from collections.abc import Mapping
+import time
+from typing import Any
+
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import CALLBACK_TYPE, Context, ServiceResponse, State, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
 from .coordinator import MonitorMySolar
-from .const import LOGGER
+from .mqttHandeler import CommandPriority, priority_for_context
+from .const import (
+    CONF_DEADBAND_SCALE,
+    CONF_MAX_INTERVAL,
+    CONF_RESTORE_MAX_AGE,
+    CONF_STATE_FILTER,
+    DEFAULT_DEADBAND_SCALE,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_RESTORE_MAX_AGE,
+    DEFAULT_STATE_FILTER,
+)
+
+
+class StateFilter:
+    """Skip state writes for changes inside a deadband or faster than an interval.
+
+    Configured from the optional ``deadband``, ``min_interval`` and
+    ``max_interval`` keys of an entity definition. A deadband is either an
+    absolute number or a percentage string such as ``"2%"`` of the last
+    written value. The filter only decides; the entity schedules the write
+    of a change held back by min_interval and the max_interval refresh.
+    """
+
+    def __init__(
+        self,
+        deadband: float = 0.0,
+        deadband_percent: float = 0.0,
+        min_interval: float = 0.0,
+        max_interval: float | None = None,
+    ) -> None:
+        """Initialize the filter."""
+        self.deadband = deadband
+        self.deadband_percent = deadband_percent
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._last_value: Any = None
+        self._last_write: float | None = None
+
+    @classmethod
+    def from_entity_info(cls, entity_info: Mapping[str, Any], options: Mapping[str, Any]) -> StateFilter | None:
+        """Build a filter for an entity definition, or None if it does not need one."""
+        if not options.get(CONF_STATE_FILTER, DEFAULT_STATE_FILTER):
+            return None
+        deadband = entity_info.get("deadband")
+        min_interval = entity_info.get("min_interval", 0)
+        if deadband is None and not min_interval:
+            return None
+
+        scale = options.get(CONF_DEADBAND_SCALE, DEFAULT_DEADBAND_SCALE)
+        max_interval = options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL) or entity_info.get("max_interval")
+        if isinstance(deadband, str) and deadband.endswith("%"):
+            return cls(
+                deadband_percent=float(deadband[:-1]) * scale,
+                min_interval=min_interval,
+                max_interval=max_interval,
+            )
+        return cls(
+            deadband=float(deadband or 0) * scale,
+            min_interval=min_interval,
+            max_interval=max_interval,
+        )
+
+    def should_write(self, value: Any) -> bool:
+        """Return True if the value should be written, and remember it if so."""
+        now = time.monotonic()
+        if self._passes(value, now):
+            self._last_value = value
+            self._last_write = now
+            return True
+        return False
 
-class MonitorMySolarEntity(CoordinatorEntity[MonitorMySolar]):
-    """Base MonitorMySolar entity."""
+    def time_until_allowed(self) -> float:
+        """Return how long until min_interval has passed since the last write."""
+        if self._last_write is None:
+            return 0.0
+        return max(0.0, self._last_write + self.min_interval - time.monotonic())
+
+    def _passes(self, value: Any, now: float) -> bool:
+        """Check a value against the last written one."""
+        last_value = self._last_value
+        if (
+            self._last_write is None
+            or not isinstance(value, (int, float))
+            or not isinstance(last_value, (int, float))
+        ):
+            return True
+
+        elapsed = now - self._last_write
+        if self.max_interval is not None and elapsed >= self.max_interval:
+            return True
+        if elapsed < self.min_interval:
+            return False
+
+        threshold = self.deadband or abs(last_value) * self.deadband_percent / 100
+        if not threshold:
+            return value != last_value
+        return abs(value - last_value) > threshold
+
+
+class MonitorMySolarEntity(CoordinatorEntity[MonitorMySolar], RestoreEntity):
+    """Base MonitorMySolar entity.
+
+    Until the first bank arrives after a restart the entity shows its last
+    saved state. Restored states older than the restore_max_age option are
+    flagged as assumed until live data confirms them. A live value that
+    matches the restored state is not written again.
+    """
 
     _attr_has_entity_name = True
+    _state_filter: StateFilter | None = None
+    # Latest value offered to the state filter, and its write timers
+    _filtered_value: Any = None
+    _unsub_deferred_write: CALLBACK_TYPE | None = None
+    _unsub_refresh: CALLBACK_TYPE | None = None
+    _restored_state: State | None = None
+    _restored_written = False
+    _written_available = True
+    write_priority = CommandPriority.INTERACTIVE
 
     def __init__(
         self,
@@ -18,19 +139,142 @@ class MonitorMySolarEntity(CoordinatorEntity[MonitorMySolar]):
     ) -> None:
         # self.coordinator = coordinator
         """Initialize light."""
-        super().__init__(coordinator)
+        # Subclasses set entity_id before calling us, so the coordinator can
+        # route changes for these entity ids straight to this entity.
+        self._slot = coordinator.entities.slot(self.entity_id)
+        dependencies = self._dependency_entity_ids()
+        self._dependency_slots = tuple(coordinator.entities.slot(entity_id) for entity_id in dependencies)
+        super().__init__(coordinator, context=dependencies)
+
+    def _dependency_entity_ids(self) -> tuple[str, ...]:
+        """Return the coordinator entity ids whose changes update this entity."""
+        return (self.entity_id,)
+
+    async def async_added_to_hass(self) -> None:
+        """Register with the coordinator and pick up values received before we were added."""
+        await super().async_added_to_hass()
+        entities = self.coordinator.entities
+        if any(entities.get_slot(slot) is not None for slot in self._dependency_slots):
+            self._handle_coordinator_update()
+            return
+
+        last_state = await self.async_get_last_state()
+        if last_state is None or last_state.state in (STATE_UNKNOWN, STATE_UNAVAILABLE):
+            return
+        if not self._restore_state(last_state):
+            return
+        self._restored_state = last_state
+        max_age = self.coordinator.entry.options.get(CONF_RESTORE_MAX_AGE, DEFAULT_RESTORE_MAX_AGE)
+        age = (dt_util.utcnow() - last_state.last_updated).total_seconds()
+        self._attr_assumed_state = age > max_age
+
+    def _restore_state(self, last_state: State) -> bool:
+        """Load the saved state into the entity, returning False if it can't be used."""
+        self._state = last_state.state
+        return True
+
+    def _has_live_value(self) -> bool:
+        """Return True once the coordinator holds a live value for this entity."""
+        return self.coordinator.entities.get_slot(self._slot) is not None
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write state, skipping the first live write if it repeats the restored state."""
+        restored = self._restored_state
+        if restored is not None:
+            # The write straight after we were added shows the restored state
+            if self._restored_written and self._has_live_value():
+                self._restored_state = None
+                if self._attr_assumed_state:
+                    self._attr_assumed_state = False
+                elif str(self.state) == restored.state and all(
+                    restored.attributes.get(key) == value
+                    for key, value in (self.extra_state_attributes or {}).items()
+                ):
+                    return
+            self._restored_written = True
+        self._written_available = self.available
+        state_filter = self._state_filter
+        if state_filter is not None and state_filter.max_interval:
+            # Rewrite a quiet entity once max_interval passes without a write
+            if self._unsub_refresh is not None:
+                self._unsub_refresh()
+            self._unsub_refresh = async_call_later(self.hass, state_filter.max_interval, self._async_refresh_state)
+        super().async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel the state filter's timers."""
+        await super().async_will_remove_from_hass()
+        for unsub in (self._unsub_deferred_write, self._unsub_refresh):
+            if unsub is not None:
+                unsub()
+        self._unsub_deferred_write = self._unsub_refresh = None
+
+    @callback
+    def async_set_context(self, context: Context) -> None:
+        """Take the priority of writes from the service call about to change us."""
+        super().async_set_context(context)
+        self.write_priority = priority_for_context(context)
+
+    async def async_get_event_history(self, offset: int, limit: int) -> ServiceResponse:
+        """Only fault and warning sensors keep a history."""
+        raise ServiceValidationError(f"{self.entity_id} has no fault or warning history")
 
     @property
     def available(self) -> bool:
-        """Return True if entity is available."""
-        return True
+        """Return False while the bank this entity's value comes from is stale."""
+        return self.coordinator.slot_available(self._slot)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Flag a written value the inverter has not read back yet."""
+        if self.coordinator.write_pending(self._slot):
+            return {"pending_write": True}
+        return None
+
+    @callback
+    def _async_write_availability(self) -> None:
+        """Write state when availability changed but there is no value, as for a bank that never arrived."""
+        if self.available != self._written_available:
+            self.async_write_ha_state()
+
+    @callback
+    def _async_write_filtered_state(self, value: Any) -> None:
+        """Write state unless the state filter considers the change insignificant.
+
+        A change held back by min_interval is written once the interval has
+        passed, since the entity is only woken again if the value changes.
+        """
+        state_filter = self._state_filter
+        self._filtered_value = value
+        if (
+            state_filter is not None
+            and self.available == self._written_available
+            and not state_filter.should_write(value)
+        ):
+            delay = state_filter.time_until_allowed()
+            if delay and self._unsub_deferred_write is None:
+                self._unsub_deferred_write = async_call_later(self.hass, delay, self._async_write_deferred)
+            return
+        self.async_write_ha_state()
+
+    @callback
+    def _async_write_deferred(self, _now: Any) -> None:
+        """Offer the latest value again once min_interval has passed."""
+        self._unsub_deferred_write = None
+        self._async_write_filtered_state(self._filtered_value)
+
+    @callback
+    def _async_refresh_state(self, _now: Any) -> None:
+        """Write the latest value of an entity that has been quiet for max_interval."""
+        self._unsub_refresh = None
+        self._async_write_filtered_state(self._filtered_value)
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
         # This method is called by your DataUpdateCoordinator when a successful update runs.
-        if self.entity_id in self.coordinator.entities:
-            self._state = self.coordinator.entities[self.entity_id]
-        else:
-            LOGGER.warning(f"entity {self.entity_id} key not found")
+        value = self.coordinator.entities.get_slot(self._slot)
+        if value is not None:
+            self._state = value
         self.async_write_ha_state()
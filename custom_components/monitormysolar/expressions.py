@@ -0,0 +1,141 @@
+"""Derived metrics defined as expressions over bank keys."""
+from __future__ import annotations
+
+import ast
+from collections.abc import Callable, Iterable, Mapping
+from datetime import datetime, timedelta
+from types import CodeType
+from typing import Any, NamedTuple
+
+
+def hours_from_now(hours: float) -> str:
+    """Return the local time a number of hours from now."""
+    return (datetime.now() + timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def hours_minutes(hours: float) -> str:
+    """Format a number of hours as 'H hours, M minutes'."""
+    return f"{int(hours)} hours, {int((hours - int(hours)) * 60)} minutes"
+
+
+# Everything an expression can call
+FUNCTIONS: dict[str, Callable[..., Any]] = {
+    "abs": abs,
+    "float": float,
+    "hours_from_now": hours_from_now,
+    "hours_minutes": hours_minutes,
+    "int": int,
+    "max": max,
+    "min": min,
+    "round": round,
+}
+
+_GLOBALS = {"__builtins__": {}, **FUNCTIONS}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.BinOp, ast.Add, ast.Sub, ast.Mult,
+    ast.Div, ast.FloorDiv, ast.Mod, ast.UnaryOp, ast.USub, ast.UAdd, ast.Not, ast.Compare,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.IfExp, ast.Call, ast.Name,
+    ast.Load, ast.Constant,
+)
+
+
+class Expression(NamedTuple):
+    """A compiled expression and the names it reads."""
+
+    source: str
+    code: CodeType
+    names: frozenset[str]
+
+
+def compile_expression(source: str) -> Expression:
+    """Compile an expression, allowing only arithmetic, comparisons and FUNCTIONS.
+
+    Raises ValueError for anything else.
+    """
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as err:
+        raise ValueError(f"Invalid expression {source!r}: {err.msg}") from err
+
+    names = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"{type(node).__name__} is not allowed in expression {source!r}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise ValueError(f"Unsupported call in expression {source!r}")
+        elif isinstance(node, ast.Name) and node.id not in FUNCTIONS:
+            names.add(node.id)
+    return Expression(source, compile(tree, "<expression>", "eval"), frozenset(names))
+
+
+class DerivedMetric(NamedTuple):
+    """One calculated value, its attributes and the keys it depends on."""
+
+    key: str
+    variables: list[tuple[str, Expression]]
+    expression: Expression
+    attributes: list[tuple[str, Expression]]
+    inputs: frozenset[str]
+
+    def evaluate(self, values: Mapping[str, Any]) -> tuple[Any, dict[str, Any]]:
+        """Evaluate the metric against input values, returning its state and attributes."""
+        namespace = dict(values)
+        for name, variable in self.variables:
+            namespace[name] = eval(variable.code, _GLOBALS, namespace)
+        state = eval(self.expression.code, _GLOBALS, namespace)
+        attributes = {
+            name: eval(attribute.code, _GLOBALS, namespace) for name, attribute in self.attributes
+        }
+        return state, attributes
+
+
+def compile_metric(key: str, calculation: dict[str, Any]) -> DerivedMetric:
+    """Compile the ``calculation`` block of an entity definition.
+
+    ``expression`` gives the state. Optional ``variables`` are evaluated in
+    order first and can be used by later variables, the state and the
+    ``attributes``.
+    """
+    variables = [(name, compile_expression(source)) for name, source in calculation.get("variables", {}).items()]
+    expression = compile_expression(calculation["expression"])
+    attributes = [(name, compile_expression(source)) for name, source in calculation.get("attributes", {}).items()]
+
+    inputs = set()
+    local_names = set()
+    for name, variable in variables:
+        inputs |= variable.names - local_names
+        local_names.add(name)
+    for compiled in (expression, *(attribute for _, attribute in attributes)):
+        inputs |= compiled.names - local_names
+    return DerivedMetric(key, variables, expression, attributes, frozenset(inputs))
+
+
+def order_metrics(metrics: Iterable[DerivedMetric]) -> tuple[list[DerivedMetric], list[str]]:
+    """Sort metrics so each comes after the metrics it reads.
+
+    Returns the ordered metrics and the keys of any left out because they
+    depend on each other in a cycle.
+    """
+    by_key = {metric.key: metric for metric in metrics}
+    ordered: list[DerivedMetric] = []
+    state: dict[str, bool] = {}  # False while visiting, True once placed
+    cyclic: list[str] = []
+
+    def visit(key: str) -> bool:
+        if key in state:
+            return state[key]
+        state[key] = False
+        metric = by_key[key]
+        placed = all(visit(name) for name in metric.inputs if name in by_key)
+        if placed:
+            ordered.append(metric)
+            state[key] = True
+        else:
+            cyclic.append(key)
+        return placed
+
+    for key in by_key:
+        visit(key)
+    return ordered, cyclic
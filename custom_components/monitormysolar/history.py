@@ -0,0 +1,81 @@
+"""Fixed-size fault and warning history persisted across restarts."""
+from __future__ import annotations
+
+from collections import deque
+from itertools import islice
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, HISTORY_SAVE_DELAY
+
+STORAGE_VERSION = 1
+
+
+class EventHistory:
+    """Ring buffer of fault or warning events, oldest first.
+
+    Entries are ``{"description", "value", "start_time", "end_time"}`` dicts
+    with ``end_time`` set to ``"Ongoing"`` until the event clears. Changes
+    are saved with a delay so a flapping event costs one write per
+    HISTORY_SAVE_DELAY seconds at most.
+    """
+
+    def __init__(self, hass: HomeAssistant, key: str, capacity: int) -> None:
+        """Initialize an empty history."""
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{key}")
+        self._entries: deque[dict[str, Any]] = deque(maxlen=capacity)
+
+    async def async_load(self) -> None:
+        """Load the saved entries, keeping the newest if capacity has shrunk."""
+        data = await self._store.async_load()
+        if data:
+            self._entries.extend(data.get("entries", []))
+
+    @property
+    def ongoing(self) -> dict[str, Any] | None:
+        """Return the newest entry if it has not ended."""
+        if self._entries and self._entries[-1]["end_time"] == "Ongoing":
+            return self._entries[-1]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @callback
+    def async_record(self, description: str, value: Any, start_time: str, end_time: str) -> None:
+        """Record an active event, extending the ongoing entry if it is the same event."""
+        ongoing = self.ongoing
+        if ongoing is not None and ongoing["description"] == description:
+            if ongoing["end_time"] == end_time:
+                return
+            ongoing["end_time"] = end_time
+        else:
+            self._entries.append({
+                "description": description,
+                "value": value,
+                "start_time": start_time,
+                "end_time": end_time,
+            })
+        self._async_schedule_save()
+
+    @callback
+    def async_resolve(self, end_time: str) -> None:
+        """Mark the ongoing entry, if any, as ended."""
+        ongoing = self.ongoing
+        if ongoing is not None:
+            ongoing["end_time"] = end_time
+            self._async_schedule_save()
+
+    def recent(self, count: int) -> list[dict[str, Any]]:
+        """Return up to count of the newest entries, newest first."""
+        return self.page(0, count)
+
+    def page(self, offset: int, limit: int) -> list[dict[str, Any]]:
+        """Return limit entries starting offset entries back from the newest."""
+        return list(islice(reversed(self._entries), offset, offset + limit))
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(lambda: {"entries": list(self._entries)}, HISTORY_SAVE_DELAY)
@@ -1,187 +1,406 @@
 import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime
+from enum import IntEnum
+from itertools import count
 import json
-from homeassistant.core import HomeAssistant
+import random
+import time
+from typing import Any, NamedTuple
+from homeassistant.core import CALLBACK_TYPE, Context, HomeAssistant, callback
 from homeassistant.components.mqtt import async_publish
 from homeassistant.components import mqtt
+from homeassistant.helpers.event import async_call_later
 
-from .const import DOMAIN, LOGGER
+from .const import (
+    COMMAND_AGING_INTERVAL,
+    COMMAND_RETRIES,
+    COMMAND_RETRY_BACKOFF,
+    COMMAND_RTT_MIN_SAMPLES,
+    COMMAND_RTT_SAMPLES,
+    COMMAND_TIMEOUT,
+    COMMAND_TIMEOUT_FACTOR,
+    COMMAND_TIMEOUT_MAX,
+    COMMAND_TIMEOUT_MIN,
+    DOMAIN,
+    LOGGER,
+    MAX_INFLIGHT_COMMANDS,
+    WRITE_BATCH_MAX,
+    WRITE_COALESCE_WINDOW,
+)
 
-class MQTTHandler:
-    def __init__(self, hass: HomeAssistant):
-        self.hass = hass
-        self.last_time_update = None
-        self.response_received_event = asyncio.Event()
-        self._processing = False  # To track if a command is currently being processed
-        self._lock = asyncio.Lock()  # A lock to ensure only one command is processed at a time
-        self.current_entity = None  # Store the current entity
-        self._unsubscribe_response = None
-
-    async def send_update(self, dongle_id, unique_id, value, entity):
-        now = datetime.now()
-        LOGGER.info(f"Sending update for {entity.entity_id} with value {value}")
 
-        # Rate limiting logic: only allow one update per 1 second per entity
-        if self.last_time_update and (now - self.last_time_update).total_seconds() < 1:
-            LOGGER.info(f"Rate limit hit for {entity.entity_id}. Dropping update.")
-            return
+class CommandPriority(IntEnum):
+    """Scheduling classes for commands, most urgent first."""
 
-        async with self._lock:  # Ensure only one command is processed at a time
-            if self._processing:
-                LOGGER.info(f"Already processing an update for {entity.entity_id}.")
-                return
+    CONTROL = 0
+    INTERACTIVE = 1
+    AUTOMATION = 2
+    BACKGROUND = 3
 
-            self._processing = True
-            self.last_time_update = now
-            self.current_entity = entity  # Store the entity to be used later in the response handling
 
-            try:
-                success = await self._process_command(dongle_id, unique_id, value, entity)
-                return success
-            finally:
-                # Clear variables after processing the command
-                self._processing = False
-                self.response_received_event.clear()
-                self.current_entity = None  # Clear entity after processing
+def priority_for_context(context: Context | None) -> CommandPriority:
+    """Return INTERACTIVE for changes a user made and AUTOMATION for the rest."""
+    if context is not None and context.user_id is not None:
+        return CommandPriority.INTERACTIVE
+    return CommandPriority.AUTOMATION
 
-    async def _process_command(self, dongle_id, unique_id, value, entity):
-        modified_dongle_id = dongle_id.replace("_", "-").split("-")
-        modified_dongle_id[1] = modified_dongle_id[1].upper()
-        modified_dongle_id = "-".join(modified_dongle_id)
 
-        topic = f"{modified_dongle_id}/update"
-        
-        # Updated payload with setting, value, and from: homeassistant
-        payload = json.dumps({
-            "setting": unique_id, 
-            "value": value, 
-            "from": "homeassistant"
-        })
-        
-        LOGGER.info(f"Sending MQTT update: {topic} - {payload} at {datetime.now()}")
-        await mqtt.async_publish(self.hass, topic, payload)
-
-        self.response_received_event.clear()  # Reset the event before sending the update
-
-        # Clean up any existing subscription
-        if self._unsubscribe_response:
-            self._unsubscribe_response()
-            self._unsubscribe_response = None
-
-        response_topic = f"{modified_dongle_id}/response"
-        # Create a single subscription and store the unsubscribe function
-        self._unsubscribe_response = await mqtt.async_subscribe(
-            self.hass, 
-            response_topic, 
-            self.response_received
-        )
+class QueuedCommand(NamedTuple):
+    """A command waiting for its turn to be sent."""
 
-        try:
-            await asyncio.wait_for(self.response_received_event.wait(), timeout=15)
-            LOGGER.debug(f"Response received or timeout for {entity.entity_id} at {datetime.now()}")
-            return True
-        except asyncio.TimeoutError:
-            LOGGER.error(f"No response received for {entity.entity_id} within the timeout period.")
-            self.hass.loop.call_soon_threadsafe(entity.revert_state)
-            return False
-        finally:
-            # Unsubscribe from the response topic
-            if self._unsubscribe_response:
-                self._unsubscribe_response()
-                self._unsubscribe_response = None
+    priority: CommandPriority
+    exclusive: bool
+    queued_at: float
+    turn: asyncio.Future
 
 
+class CommandScheduler:
+    """Let commands through by priority, MAX_INFLIGHT_COMMANDS at a time.
 
-    async def response_received(self, msg):
-        """Handle the response received message."""
-        entity = self.current_entity
-        if not entity:
-            return
+    A waiting command moves up one class every COMMAND_AGING_INTERVAL
+    seconds so background work can't starve. An exclusive command waits for
+    everything in flight to finish and holds back every other command until
+    it is done.
+    """
+
+    def __init__(self) -> None:
+        self._inflight = 0
+        self._exclusive = False
+        self._waiting: list[QueuedCommand] = []
+        # Per class: longest wait since the coordinator last read it, longest ever, and count
+        self.wait_stats = {
+            priority: {"peak_wait_ms": 0.0, "max_wait_ms": 0.0, "commands": 0} for priority in CommandPriority
+        }
+
+    def queued(self, priority: CommandPriority) -> int:
+        """Return how many commands of a class are waiting."""
+        return sum(1 for command in self._waiting if command.priority == priority)
+
+    @asynccontextmanager
+    async def turn(self, priority: CommandPriority, exclusive: bool = False):
+        """Wait for a command's turn, yielding False if the queue was cancelled instead."""
+        queued_at = time.monotonic()
+        if self._waiting or not self._can_start(exclusive):
+            command = QueuedCommand(priority, exclusive, queued_at, asyncio.get_running_loop().create_future())
+            self._waiting.append(command)
+            try:
+                granted = await command.turn
+            except asyncio.CancelledError:
+                if command in self._waiting:
+                    self._waiting.remove(command)
+                    # A cancelled command at the head may have been holding others back
+                    self._start_waiting()
+                elif command.turn.done() and not command.turn.cancelled() and command.turn.result():
+                    self._release(exclusive)
+                raise
+            if not granted:
+                yield False
+                return
+        else:
+            self._start(exclusive)
 
-        LOGGER.info(f"Received response for topic {msg.topic} at {datetime.now()}: {msg.payload}")
+        stats = self.wait_stats[priority]
+        wait_ms = (time.monotonic() - queued_at) * 1000
+        stats["peak_wait_ms"] = max(stats["peak_wait_ms"], wait_ms)
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+        stats["commands"] += 1
         try:
-            response = json.loads(msg.payload)
-            
-            if response.get('status') == 'success':
-                LOGGER.info(f"Successfully updated state of entity {entity.entity_id}.")
-                # Keep the current state as it was already optimistically updated
-                self.hass.loop.call_soon_threadsafe(entity.async_write_ha_state)
-            else:
-                LOGGER.error(f"Failed to update state for {entity.entity_id}, reverting state.")
-                self.hass.loop.call_soon_threadsafe(entity.revert_state)
-        except json.JSONDecodeError:
-            LOGGER.error(f"Failed to decode JSON response for {entity.entity_id}: {msg.payload}")
-            self.hass.loop.call_soon_threadsafe(entity.revert_state)
+            yield True
         finally:
-            # Unsubscribe and clear the event
-            if self._unsubscribe_response:
-                self._unsubscribe_response()
-                self._unsubscribe_response = None
-            self.response_received_event.set()
+            self._release(exclusive)
 
+    def _can_start(self, exclusive: bool) -> bool:
+        if self._exclusive:
+            return False
+        if exclusive:
+            return self._inflight == 0
+        return self._inflight < MAX_INFLIGHT_COMMANDS
 
+    def _start(self, exclusive: bool) -> None:
+        if exclusive:
+            self._exclusive = True
+        else:
+            self._inflight += 1
 
+    def _release(self, exclusive: bool) -> None:
+        if exclusive:
+            self._exclusive = False
+        else:
+            self._inflight -= 1
+        self._start_waiting()
 
-    async def send_multiple_updates(self, dongle_id, payload_dict, entity):
-        """Handle multiple settings updates."""
-        now = datetime.now()
-        LOGGER.info(f"Sending multiple updates for {entity.entity_id} with payload {payload_dict}")
+    def _start_waiting(self) -> None:
+        """Start waiting commands in order of aged priority while there is room."""
+        while self._waiting:
+            now = time.monotonic()
+            # Ties go to the command queued first
+            command = min(
+                self._waiting,
+                key=lambda command: command.priority - (now - command.queued_at) / COMMAND_AGING_INTERVAL,
+            )
+            # The next command blocks those behind it, so an exclusive one drains the queue
+            if not self._can_start(command.exclusive):
+                return
+            self._waiting.remove(command)
+            if command.turn.done():
+                continue
+            self._start(command.exclusive)
+            command.turn.set_result(True)
 
-        if self.last_time_update and (now - self.last_time_update).total_seconds() < 1:
-            LOGGER.info(f"Rate limit hit for {entity.entity_id}. Dropping update.")
-            return
+    def cancel(self) -> None:
+        """Turn away every waiting command."""
+        waiting, self._waiting = self._waiting, []
+        for command in waiting:
+            if not command.turn.done():
+                command.turn.set_result(False)
 
-        async with self._lock:
-            if self._processing:
-                LOGGER.info(f"Already processing an update for {entity.entity_id}.")
-                return
 
-            self._processing = True
-            self.last_time_update = now
-            self.current_entity = entity
+class PendingCommand(NamedTuple):
+    """A command waiting for its response."""
 
-            try:
-                success = await self._process_multiple_commands(dongle_id, payload_dict, entity)
-                return success
-            finally:
-                self._processing = False
-                self.response_received_event.clear()
-                self.current_entity = None
+    description: str
+    response: asyncio.Future
+
+
+class QueuedSetting(NamedTuple):
+    """The latest value queued for a setting and the writes waiting on it."""
 
-    async def _process_multiple_commands(self, dongle_id, payload_dict, entity):
-        """Process multiple commands in a single payload."""
+    value: Any
+    waiters: list[asyncio.Future]
+
+
+class RoundTripTimes:
+    """Rolling window of command round trip times that timeouts are derived from."""
+
+    def __init__(self, size: int = COMMAND_RTT_SAMPLES) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, rtt: float) -> None:
+        self._samples.append(rtt)
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the given percentile of the window, or None while it is too small."""
+        if len(self._samples) < COMMAND_RTT_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    @property
+    def timeout(self) -> float:
+        """Return how long to wait for a response before resending."""
+        p99 = self.percentile(99)
+        if p99 is None:
+            return COMMAND_TIMEOUT
+        return min(COMMAND_TIMEOUT_MAX, max(COMMAND_TIMEOUT_MIN, p99 * COMMAND_TIMEOUT_FACTOR))
+
+
+class MQTTHandler:
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        # Commands beyond MAX_INFLIGHT_COMMANDS wait here instead of being dropped
+        self.scheduler = CommandScheduler()
+        self._pending: dict[str, PendingCommand] = {}  # Correlation id -> command, oldest first
+        self._correlation_ids = count(1)
+        self.round_trips = RoundTripTimes()
+        # Resending is only safe once the dongle has shown it echoes correlation ids
+        self._ids_echoed = False
+        # Settings collected over WRITE_COALESCE_WINDOW and sent as one command
+        self._write_batch: dict[str, QueuedSetting] = {}
+        self._write_dongle_id: str | None = None
+        self._write_priority = CommandPriority.BACKGROUND
+        self._unsub_write_flush: CALLBACK_TYPE | None = None
+
+    async def send_update(
+        self, dongle_id, unique_id, value, entity,
+        priority=CommandPriority.INTERACTIVE, exclusive=False, apply_result=True,
+    ):
+        """Send a single setting straight away, bypassing the write queue.
+
+        An exclusive command, such as a firmware update, runs with nothing
+        else in flight. Entities without an optimistic state to keep or
+        revert, such as buttons, pass apply_result=False.
+        """
+        LOGGER.info(f"Sending update for {entity.entity_id} with value {value}")
+        response = await self._send_command(
+            dongle_id, {"setting": unique_id, "value": value}, entity.entity_id, priority, exclusive, retries=0
+        )
+        success = self._succeeded(response)
+        if not apply_result:
+            if not success:
+                LOGGER.error(f"Command for {entity.entity_id} failed.")
+            return success
+        return self._apply_result(entity, success)
+
+    async def queue_update(self, dongle_id, settings, description, priority=CommandPriority.INTERACTIVE):
+        """Queue settings to be sent together with any others changed shortly after.
+
+        A setting queued again before the batch goes out only sends its latest
+        value, and the batch is scheduled with its most urgent priority.
+        Returns True if the command carrying the settings succeeded; callers
+        decide what that means for their entities.
+        """
+        LOGGER.info(f"Queueing update for {description} with payload {settings}")
+        if self._write_batch and len(self._write_batch.keys() | settings.keys()) > WRITE_BATCH_MAX:
+            # Send what is queued first rather than grow a command past the limit
+            self._async_flush_writes()
+        batch = self._write_batch
+        self._write_dongle_id = dongle_id
+        self._write_priority = min(self._write_priority, priority)
+        future = self.hass.loop.create_future()
+        for setting, value in settings.items():
+            waiters = batch[setting].waiters if setting in batch else []
+            batch[setting] = QueuedSetting(value, waiters)
+        batch[next(iter(settings))].waiters.append(future)
+
+        if len(batch) >= WRITE_BATCH_MAX:
+            self._async_flush_writes()
+        elif self._unsub_write_flush is None:
+            self._unsub_write_flush = async_call_later(
+                self.hass, WRITE_COALESCE_WINDOW, self._async_flush_writes
+            )
+        return await future
+
+    @callback
+    def _async_flush_writes(self, _now=None):
+        """Send the queued settings as one command."""
+        if self._unsub_write_flush is not None:
+            self._unsub_write_flush()
+            self._unsub_write_flush = None
+        batch, self._write_batch = self._write_batch, {}
+        priority, self._write_priority = self._write_priority, CommandPriority.BACKGROUND
+        if batch:
+            self.hass.async_create_task(self._async_send_batch(self._write_dongle_id, batch, priority))
+
+    async def _async_send_batch(self, dongle_id, batch, priority):
+        """Send a batch of settings and resolve every write waiting on it."""
+        if len(batch) == 1:
+            [(setting, queued)] = batch.items()
+            command = {"setting": setting, "value": queued.value}
+        else:
+            # Create payload with multiple settings
+            command = {
+                "settings": [
+                    {"setting": setting, "value": queued.value}
+                    for setting, queued in batch.items()
+                ]
+            }
+        success = False
+        try:
+            retries = COMMAND_RETRIES if self._ids_echoed else 0
+            response = await self._send_command(dongle_id, command, ", ".join(batch), priority, retries=retries)
+            success = self._succeeded(response)
+        finally:
+            for queued in batch.values():
+                for waiter in queued.waiters:
+                    if not waiter.done():
+                        waiter.set_result(success)
+
+    async def _send_command(self, dongle_id, command, description, priority, exclusive=False, retries=0):
+        """Publish a command and return the response carrying its correlation id, or None.
+
+        An unanswered command is resent up to retries times with the same id,
+        so the dongle can recognise a repeat of a setting it already applied
+        and the late acknowledgement of any attempt still counts. Only
+        setting writes are retried; a button or update is never sent twice.
+        """
         modified_dongle_id = dongle_id.replace("_", "-").split("-")
         modified_dongle_id[1] = modified_dongle_id[1].upper()
         modified_dongle_id = "-".join(modified_dongle_id)
 
-        topic = f"{modified_dongle_id}/update"
-        
-        # Create payload with multiple settings
-        settings = []
-        for setting, value in payload_dict.items():
-            settings.append({
-                "setting": setting,
-                "value": value
+        async with self.scheduler.turn(priority, exclusive) as granted:
+            if not granted:
+                return None
+            correlation_id = f"{next(self._correlation_ids)}"
+            pending = PendingCommand(description, self.hass.loop.create_future())
+            self._pending[correlation_id] = pending
+            # The coordinator routes {dongle}/response to async_response_received
+            topic = f"{modified_dongle_id}/update"
+            payload = json.dumps({
+                **command,
+                "id": correlation_id,
+                "from": "homeassistant"
             })
-        
-        payload = json.dumps({
-            "settings": settings,
-            "from": "homeassistant"
-        })
-        
-        LOGGER.info(f"Sending multiple MQTT updates: {topic} - {payload} at {datetime.now()}")
-        await mqtt.async_publish(self.hass, topic, payload)
+            try:
+                for attempt in range(retries + 1):
+                    if attempt:
+                        backoff = COMMAND_RETRY_BACKOFF * 2 ** (attempt - 1)
+                        await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                        if pending.response.done():
+                            break
+                        LOGGER.warning(f"Resending command for {description}, attempt {attempt + 1}")
+                    LOGGER.info(f"Sending MQTT update: {topic} - {payload} at {datetime.now()}")
+                    sent = time.monotonic()
+                    await mqtt.async_publish(self.hass, topic, payload)
+                    timeout = self.round_trips.timeout
+                    try:
+                        await asyncio.wait_for(asyncio.shield(pending.response), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        LOGGER.debug(f"No response for {description} after {timeout:.1f}s")
+                        continue
+                    # A response to a resent command can't be told apart from a
+                    # late one to an earlier attempt, so only first attempts are timed
+                    if not attempt:
+                        self.round_trips.add(time.monotonic() - sent)
+                    break
+                else:
+                    LOGGER.error(f"No response received for {description} after {retries + 1} attempts.")
+                    return None
+                response = pending.response.result()
+            finally:
+                self._pending.pop(correlation_id, None)
 
-        self.response_received_event.clear()
+        LOGGER.info(f"Received response for {description} at {datetime.now()}: {response}")
+        return response
 
-        response_topic = f"{modified_dongle_id}/response"
-        await mqtt.async_subscribe(self.hass, response_topic, self.response_received)
+    @staticmethod
+    def _succeeded(response):
+        """Return True if a response reports success."""
+        return isinstance(response, dict) and response.get('status') == 'success'
 
-        try:
-            await asyncio.wait_for(self.response_received_event.wait(), timeout=15)
-            LOGGER.debug(f"Response received or timeout for {entity.entity_id} at {datetime.now()}")
-            return True
-        except asyncio.TimeoutError:
-            LOGGER.error(f"No response received for {entity.entity_id} within the timeout period.")
+    def _apply_result(self, entity, success):
+        """Keep an entity's optimistic state on success, revert it otherwise."""
+        if success:
+            LOGGER.info(f"Successfully updated state of entity {entity.entity_id}.")
+            # Keep the current state as it was already optimistically updated
+            self.hass.loop.call_soon_threadsafe(entity.async_write_ha_state)
+        else:
+            LOGGER.error(f"Failed to update state for {entity.entity_id}, reverting state.")
             self.hass.loop.call_soon_threadsafe(entity.revert_state)
-            return False
\ No newline at end of file
+        return success
+
+    @callback
+    def async_response_received(self, response):
+        """Match a decoded response to the command that sent it."""
+        correlation_id = response.get("id") if isinstance(response, dict) else None
+        if correlation_id is not None:
+            pending = self._pending.get(f"{correlation_id}")
+            if pending is not None:
+                self._ids_echoed = True
+        else:
+            # Firmware that doesn't echo ids answers in order
+            pending = next(
+                (command for command in self._pending.values() if not command.response.done()), None
+            )
+        if pending is None:
+            LOGGER.debug(f"Response does not match a pending command: {response}")
+            return
+        if not pending.response.done():
+            pending.response.set_result(response)
+
+    @callback
+    def async_cancel_pending(self):
+        """Fail every queued and pending command, reverting their entities."""
+        self.scheduler.cancel()
+        if self._unsub_write_flush is not None:
+            self._unsub_write_flush()
+            self._unsub_write_flush = None
+        batch, self._write_batch = self._write_batch, {}
+        for queued in batch.values():
+            for waiter in queued.waiters:
+                if not waiter.done():
+                    waiter.set_result(False)
+        for pending in self._pending.values():
+            if not pending.response.done():
+                pending.response.set_result(None)
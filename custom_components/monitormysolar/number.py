@@ -1,5 +1,5 @@
 from homeassistant.components.number import NumberEntity
-from homeassistant.core import callback
+from homeassistant.core import State, callback
 import json
 from homeassistant.helpers.event import (
     async_track_state_change_event,
@@ -67,14 +67,10 @@ class InverterNumber(MonitorMySolarEntity, NumberEntity):
             self._previous_value = self._attr_native_value
             # Set the new value
             self._attr_native_value = value
-            self.async_write_ha_state()
 
-            # Send the update via MQTT
-            await mqtt_handler.send_update(
-                self._dongle_id.replace("_", "-"),
-                self.entity_info["unique_id"],
-                value,
-                self,
+            # Send the update via MQTT and confirm it when the holdbank reads it back
+            await self.coordinator.async_write_settings(
+                self, {self.entity_info["unique_id"]: value}
             )
         else:
             LOGGER.error("MQTT Handler is not initialized")
@@ -85,13 +81,23 @@ class InverterNumber(MonitorMySolarEntity, NumberEntity):
         self._attr_native_value = self._previous_value
         self.hass.loop.call_soon_threadsafe(self.async_write_ha_state)
 
+    def _restore_state(self, last_state: State) -> bool:
+        """Restore the last known value."""
+        try:
+            self._attr_native_value = float(last_state.state)
+        except ValueError:
+            return False
+        self._previous_value = self._attr_native_value
+        return True
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
 
         # This method is called by your DataUpdateCoordinator when a successful update runs.
-        if self.entity_id in self.coordinator.entities:
-            value = self.coordinator.entities[self.entity_id]
-            if value is not None:
-                self._attr_native_value = value
-                self.hass.loop.call_soon_threadsafe(self.async_write_ha_state)
+        value = self.coordinator.entities.get_slot(self._slot)
+        if value is None:
+            self._async_write_availability()
+        else:
+            self._attr_native_value = value
+            self.hass.loop.call_soon_threadsafe(self.async_write_ha_state)
@@ -0,0 +1,77 @@
+"""Decoding of banks published as raw 16-bit register arrays."""
+from __future__ import annotations
+
+from array import array
+import base64
+import binascii
+import sys
+from typing import Any, NamedTuple
+
+
+class RegisterField(NamedTuple):
+    """Where one payload key lives in a register bank."""
+
+    key: str
+    offset: int
+    scale: float | None
+    signed: bool
+    shift: int
+    mask: int
+    power_factor: bool
+
+
+def build_register_layouts(brand_entities: dict[str, Any]) -> dict[str, list[RegisterField]]:
+    """Collect the register layout of every bank from entity definitions.
+
+    A definition takes part when it has a ``register`` offset. ``scale``
+    multiplies the raw value, ``signed`` reads it as two's complement and
+    ``register_byte`` picks the ``"low"`` or ``"high"`` byte of the register.
+    ``register_format: "power_factor"`` reads values above 1000 as a
+    leading power factor of 1000 minus the value.
+    """
+    layouts: dict[str, dict[str, RegisterField]] = {}
+    for banks in brand_entities.values():
+        if not isinstance(banks, dict):
+            continue
+        for bank_name, entities in banks.items():
+            for entity in entities:
+                if "register" not in entity:
+                    continue
+                register_byte = entity.get("register_byte")
+                layouts.setdefault(bank_name, {}).setdefault(entity["unique_id"], RegisterField(
+                    key=entity["unique_id"],
+                    offset=entity["register"],
+                    scale=entity.get("scale"),
+                    signed=entity.get("signed", False),
+                    shift=8 if register_byte == "high" else 0,
+                    mask=0xFFFF if register_byte is None else 0xFF,
+                    power_factor=entity.get("register_format") == "power_factor",
+                ))
+    return {bank_name: list(fields.values()) for bank_name, fields in layouts.items()}
+
+
+def unpack_registers(data: dict[str, Any]) -> array:
+    """Turn a ``{"registers": ..., "encoding": "base64" | "hex"}`` message into register values.
+
+    Raises ValueError if the blob is missing or cannot be decoded.
+    """
+    blob = data.get("registers")
+    if not isinstance(blob, str):
+        raise ValueError("No register blob in message")
+    try:
+        if data.get("encoding", "base64") == "hex":
+            raw = bytes.fromhex(blob)
+        else:
+            raw = base64.b64decode(blob, validate=True)
+    except binascii.Error as err:
+        raise ValueError(f"Invalid register blob: {err}") from err
+    if len(raw) % 2:
+        raise ValueError("Register blob has an odd number of bytes")
+
+    registers = array("H")
+    registers.frombytes(raw)
+    # Modbus registers are big-endian on the wire
+    if sys.byteorder == "little":
+        registers.byteswap()
+    return registers
+
@@ -1,5 +1,5 @@
 from homeassistant.components.select import SelectEntity
-from homeassistant.core import callback
+from homeassistant.core import State, callback
 from homeassistant.helpers.event import (
     async_track_state_change_event,
 )
@@ -45,6 +45,7 @@ class InverterSelect(MonitorMySolarEntity, SelectEntity):
         self.hass = hass
         self._options = entity_info["options"]
         self._manufacturer = entry.data.get("inverter_brand")
+        self._previous_state = None
 
         super().__init__(self.coordinator)
 
@@ -75,23 +76,18 @@ class InverterSelect(MonitorMySolarEntity, SelectEntity):
     async def async_select_option(self, option):
         """Update the select option."""
         LOGGER.info(f"Setting select option for {self.entity_id} to {option}")
+        self._previous_state = self._state
         self._state = option
-        self.async_write_ha_state
-
-
 
         bit_value = self._options.index(option)
-        LOGGER.info(f"Setting Select value for {self.entity_id} to {option}")
-        await self.coordinator.mqtt_handler.send_update(
-            self._dongle_id.replace("_", "-"),
-            self.entity_info["unique_id"],
-            bit_value,
-            self,
+        await self.coordinator.async_write_settings(
+            self, {self.entity_info["unique_id"]: bit_value}
         )
 
     def revert_state(self):
         """Revert to the previous state."""
-        LOGGER.info(f"Reverting state for {self.entity_id} to {self._state}")
+        LOGGER.info(f"Reverting state for {self.entity_id} to {self._previous_state}")
+        self._state = self._previous_state
         # Schedule state revert on the main thread
         self.hass.loop.call_soon_threadsafe(self.async_write_ha_state)
 
@@ -100,16 +96,17 @@ class InverterSelect(MonitorMySolarEntity, SelectEntity):
         """Update sensor with latest data from coordinator."""
 
         # This method is called by your DataUpdateCoordinator when a successful update runs.
-        if self.entity_id in self.coordinator.entities:
-            value = self.coordinator.entities[self.entity_id]
-            if value is not None:
-                self._state = (
-                    self._options[value]
-                    if isinstance(value, int) and value < len(self._options)
-                    else value
-                )
-                # Schedule state update on the main thread
-                self.hass.loop.call_soon_threadsafe(self.async_write_ha_state)
+        value = self.coordinator.entities.get_slot(self._slot)
+        if value is None:
+            self._async_write_availability()
+        else:
+            self._state = (
+                self._options[value]
+                if isinstance(value, int) and value < len(self._options)
+                else value
+            )
+            # Schedule state update on the main thread
+            self.hass.loop.call_soon_threadsafe(self.async_write_ha_state)
 
 
 class QuickChargeDurationSelect(MonitorMySolarEntity, SelectEntity):
@@ -127,6 +124,7 @@ class QuickChargeDurationSelect(MonitorMySolarEntity, SelectEntity):
         self.hass = hass
         self._manufacturer = entry.data.get("inverter_brand")
         self._additional_payload = entity_info.get("additional_payload")
+        self._previous_option = self._attr_current_option
 
         super().__init__(self.coordinator)
 
@@ -146,15 +144,10 @@ class QuickChargeDurationSelect(MonitorMySolarEntity, SelectEntity):
                 if additional_value is not None:
                     payload_dict[self._additional_payload["key"]] = additional_value
 
-            # Send the multiple updates via MQTT
-            await mqtt_handler.send_multiple_updates(
-                self._dongle_id.replace("_", "-"),
-                payload_dict,
-                self,
-            )
-            
+            self._previous_option = self._attr_current_option
             self._attr_current_option = option
-            self.async_write_ha_state()
+            # Send the multiple updates via MQTT
+            await self.coordinator.async_write_settings(self, payload_dict)
         else:
             LOGGER.error("MQTT Handler is not initialized")
 
@@ -163,9 +156,23 @@ class QuickChargeDurationSelect(MonitorMySolarEntity, SelectEntity):
         """Update sensor with latest data from coordinator."""
 
         # This method is called by your DataUpdateCoordinator when a successful update runs.
-        if self.entity_id in self.coordinator.entities:
-            value = self.coordinator.entities[self.entity_id]
-            if value is not None:
-                if value in self._attr_options:
-                    self._attr_current_option = value
-                    self.async_write_ha_state()
\ No newline at end of file
+        value = self.coordinator.entities.get_slot(self._slot)
+        if value is None:
+            self._async_write_availability()
+        else:
+            if value in self._attr_options:
+                self._attr_current_option = value
+                self.async_write_ha_state()
+
+    def revert_state(self):
+        """Revert to the previous option."""
+        LOGGER.info(f"Reverting state for {self.entity_id} to {self._previous_option}")
+        self._attr_current_option = self._previous_option
+        self.async_write_ha_state()
+
+    def _restore_state(self, last_state: State) -> bool:
+        """Restore the last option if it is still valid."""
+        if last_state.state not in self._attr_options:
+            return False
+        self._attr_current_option = last_state.state
+        return True
@@ -1,6 +1,9 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
 from typing import cast
+
+import voluptuous as vol
+
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
@@ -16,23 +19,38 @@ from homeassistant.const import (
     UnitOfPower,
     UnitOfTemperature,
     STATE_UNKNOWN,
+    EntityCategory,
 )
 from homeassistant.core import (
     Event,
     EventStateChangedData,
     HomeAssistant,
+    ServiceResponse,
     State,
+    SupportsResponse,
     callback,
 )
+from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.event import (
     async_track_state_change_event,
 )
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util.unit_system import METRIC_SYSTEM, US_CUSTOMARY_SYSTEM
 
-from .const import DOMAIN, ENTITIES, FIRMWARE_CODES, LOGGER
+from .const import (
+    DOMAIN,
+    ENTITIES,
+    FIRMWARE_CODES,
+    HISTORY_ATTRIBUTE_ENTRIES,
+    HISTORY_CAPACITY,
+    LOGGER,
+)
 from .coordinator import MonitorMySolarEntry
-from .entity import MonitorMySolarEntity
+from .entity import MonitorMySolarEntity, StateFilter
+from .history import EventHistory
+
+SERVICE_GET_EVENT_HISTORY = "get_event_history"
 
 async def async_setup_entry(hass, entry: MonitorMySolarEntry, async_add_entities):
     coordinator = entry.runtime_data
@@ -55,6 +73,10 @@ async def async_setup_entry(hass, entry: MonitorMySolarEntry, async_add_entities
                         entities.append(
                             StatusSensor(sensor, hass, entry, bank_name),
                         )
+                    elif bank_name == "diagnostic":
+                        entities.append(
+                            DiagnosticSensor(sensor, hass, entry, bank_name),
+                        )
                     elif bank_name == "powerflow":
                         entities.append(
                             PowerFlowSensor(sensor, hass, entry, bank_name)
@@ -88,6 +110,17 @@ async def async_setup_entry(hass, entry: MonitorMySolarEntry, async_add_entities
 
     async_add_entities(entities)
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_GET_EVENT_HISTORY,
+        {
+            vol.Optional("offset", default=0): cv.positive_int,
+            vol.Optional("limit", default=50): vol.All(vol.Coerce(int), vol.Range(min=1, max=HISTORY_CAPACITY)),
+        },
+        "async_get_event_history",
+        supports_response=SupportsResponse.ONLY,
+    )
+
 
 class InverterSensor(MonitorMySolarEntity, SensorEntity):
     def __init__(self, sensor_info, hass, entry, bank_name):
@@ -105,6 +138,7 @@ class InverterSensor(MonitorMySolarEntity, SensorEntity):
         self.entity_id: str = f"sensor.{self._device_id}_{self._sensor_type.lower()}"
         self.hass = hass
         self._manufacturer = entry.data.get("inverter_brand")
+        self._state_filter = StateFilter.from_entity_info(sensor_info, entry.options)
         LOGGER.debug(f"Initialized sensor {self.entity_id}")
 
         super().__init__(self.coordinator)
@@ -153,23 +187,21 @@ class InverterSensor(MonitorMySolarEntity, SensorEntity):
         """Update sensor with latest data from coordinator."""
 
         # This method is called by your DataUpdateCoordinator when a successful update runs.
-        if self.entity_id in self.coordinator.entities:
-            value = self.coordinator.entities[self.entity_id]
-            if value is not None:
-                if self._sensor_type == "RunningTime" and isinstance(value, (float, int)):
-                    # Convert seconds to HH:MM:SS format
-                    seconds = int(value)
-                    hours, remainder = divmod(seconds, 3600)
-                    minutes, seconds = divmod(remainder, 60)
-                    self._state = f"{hours:02}:{minutes:02}:{seconds:02}"
-                else:
-                    self._state = (
-                        round(value, 2) if isinstance(value, (float, int)) else value
-                    )
-                self.async_write_ha_state()
+        value = self.coordinator.entities.get_slot(self._slot)
+        if value is None:
+            self._async_write_availability()
         else:
-            LOGGER.warning(f"entity {self.entity_id} key not found")
-
+            if self._sensor_type == "RunningTime" and isinstance(value, (float, int)):
+                # Convert seconds to HH:MM:SS format
+                seconds = int(value)
+                hours, remainder = divmod(seconds, 3600)
+                minutes, seconds = divmod(remainder, 60)
+                self._state = f"{hours:02}:{minutes:02}:{seconds:02}"
+            else:
+                self._state = (
+                    round(value, 2) if isinstance(value, (float, int)) else value
+                )
+            self._async_write_filtered_state(self._state)
 
 
 class StatusSensor(MonitorMySolarEntity, SensorEntity):
@@ -233,20 +265,88 @@ class StatusSensor(MonitorMySolarEntity, SensorEntity):
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
-        if self.entity_id in self.coordinator.entities:
-            value = self.coordinator.entities[self.entity_id]
-            if isinstance(value, dict):
-                # Extract the 'uptime' for the sensor's state
-                self._state = value.get("uptime")
-                LOGGER.debug(f'State updated to: {self._state}')
+        value = self.coordinator.entities.get_slot(self._slot)
+        if isinstance(value, dict):
+            # Extract the 'uptime' for the sensor's state
+            self._state = value.get("uptime")
+            LOGGER.debug(f'State updated to: {self._state}')
 
-                # Update the sensor's attributes based on the expected attributes list
-                for attr in self._expected_attributes:
-                    self._attributes[attr] = value.get(attr, "unknown")
+            # Update the sensor's attributes based on the expected attributes list
+            for attr in self._expected_attributes:
+                self._attributes[attr] = value.get(attr, "unknown")
 
-                LOGGER.debug(f'Attributes updated to: {self._attributes}')
+            LOGGER.debug(f'Attributes updated to: {self._attributes}')
 
-                self.async_write_ha_state()
+            self.async_write_ha_state()
+
+class DiagnosticSensor(MonitorMySolarEntity, SensorEntity):
+    """Sensor exposing coordinator statistics."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    # Running totals change every update and would fill the recorder
+    _unrecorded_attributes = frozenset({
+        "flushes", "messages", "max_merged", "average_merged",
+        "dropped", "superseded", "max_lag_ms", "max_wait_ms", "commands",
+    })
+
+    def __init__(self, sensor_info, hass, entry, bank_name):
+        """Initialize the sensor."""
+        self.coordinator = entry.runtime_data
+        self.sensor_info = sensor_info
+        self._name = sensor_info["name"]
+        self._unique_id = f"{entry.entry_id}_{sensor_info['unique_id']}".lower()
+        self._state = None
+        self._dongle_id = self.coordinator.dongle_id
+        self._sensor_type = sensor_info["unique_id"]
+        self._bank_name = bank_name
+        self.entity_id = f"sensor.{self._dongle_id}_{self._sensor_type.lower()}"
+        self.hass = hass
+        self._manufacturer = entry.data.get("inverter_brand")
+        self._attributes = {attr: None for attr in sensor_info.get("attributes", [])}
+
+        super().__init__(self.coordinator)
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def unique_id(self):
+        return self._unique_id
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def state_class(self):
+        return self.sensor_info.get("state_class")
+
+    @property
+    def unit_of_measurement(self):
+        return self.sensor_info.get("unit_of_measurement")
+
+    @property
+    def extra_state_attributes(self):
+        return self._attributes
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {(DOMAIN, self._dongle_id)},
+            "name": f"Inverter {self._dongle_id}",
+            "manufacturer": f"{self._manufacturer}",
+        }
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update sensor with latest statistics from coordinator."""
+        value = self.coordinator.entities.get_slot(self._slot)
+        if isinstance(value, dict):
+            self._state = value.get("value")
+            for attr in self._attributes:
+                self._attributes[attr] = value.get(attr)
+            self.async_write_ha_state()
 
 class PowerFlowSensor(MonitorMySolarEntity, SensorEntity):
     def __init__(self, sensor_info, hass, entry, bank_name):
@@ -266,8 +366,16 @@ class PowerFlowSensor(MonitorMySolarEntity, SensorEntity):
         self._attribute2 = sensor_info.get("attribute2")
         self._value1 = 0
         self._value2 = 0
+        self._attribute1_entity_id = f"sensor.{self._dongle_id}_{self._attribute1.lower()}"
+        self._attribute2_entity_id = f"sensor.{self._dongle_id}_{self._attribute2.lower()}"
 
         super().__init__(self.coordinator)
+        self._attribute1_slot = self.coordinator.entities.slot(self._attribute1_entity_id)
+        self._attribute2_slot = self.coordinator.entities.slot(self._attribute2_entity_id)
+
+    def _dependency_entity_ids(self) -> tuple[str, ...]:
+        """Update when the flow or either source attribute changes."""
+        return (self.entity_id, self._attribute1_entity_id, self._attribute2_entity_id)
 
     @property
     def name(self):
@@ -312,22 +420,16 @@ class PowerFlowSensor(MonitorMySolarEntity, SensorEntity):
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
-        attr1_entity_id = f"sensor.{self.coordinator.dongle_id}_{self._attribute1.lower()}"
-        attr2_entity_id = f"sensor.{self.coordinator.dongle_id}_{self._attribute2.lower()}"
-        if attr1_entity_id in self.coordinator.entities:
-            attr1_value = self.coordinator.entities[attr1_entity_id]
-            if attr1_value is not None:
-                self._value1 = float(attr1_value)
-        if attr2_entity_id in self.coordinator.entities:
-            attr2_value = self.coordinator.entities[attr2_entity_id]
-            if attr2_value is not None:
-                self._value2 = float(attr2_value)
-
-        # Calculate the flow value
-        if self._value1 > 0:
-            self._state = -1 * self._value1
-        else:
-            self._state = self._value2
+        entities = self.coordinator.entities
+        attr1_value = entities.get_slot(self._attribute1_slot)
+        if attr1_value is not None:
+            self._value1 = float(attr1_value)
+        attr2_value = entities.get_slot(self._attribute2_slot)
+        if attr2_value is not None:
+            self._value2 = float(attr2_value)
+
+        # The flow value itself is calculated by the coordinator
+        self._state = self.coordinator.entities.get_slot(self._slot)
 
         self.async_write_ha_state()
 
@@ -391,16 +493,15 @@ class CombinedSensor(MonitorMySolarEntity, SensorEntity):
         """Update sensor with latest data from coordinator."""
         LOGGER.warning(f"CombinedSensor id: {self.entity_id}")
         LOGGER.warning(f"sensor_values: {self._sensor_values}")
-        if self.entity_id in self.coordinator.entities:
-            value = self.coordinator.entities[self.entity_id]
-            if value is not None:
+        value = self.coordinator.entities.get_slot(self._slot)
+        if value is not None:
 
-                if self.entity_id in self._sensor_values:
-                    self._sensor_values[self.entity_id] = float(value)
+            if self.entity_id in self._sensor_values:
+                self._sensor_values[self.entity_id] = float(value)
 
-                    # Example operation: Summing all sensor values
-                    self._state = sum(self._sensor_values.values())
-                    self.async_write_ha_state()
+                # Example operation: Summing all sensor values
+                self._state = sum(self._sensor_values.values())
+                self.async_write_ha_state()
 
 class BankUpdateSensor(MonitorMySolarEntity, SensorEntity):
     def __init__(self, sensor_info, hass, entry, bank_name):
@@ -452,12 +553,11 @@ class BankUpdateSensor(MonitorMySolarEntity, SensorEntity):
         }
 
     @callback
-    def _handle_bank_update(self, event):
-        """Handle bank update events."""
-        bank_name = event.data.get("bank_name")
+    def _handle_bank_update(self, bank_name, received_at):
+        """Handle a bank arriving from our dongle."""
         LOGGER.debug(f"Update Event Called for: {bank_name}")
         if bank_name:
-            current_time = datetime.now().isoformat()
+            current_time = received_at.isoformat()
             attr_name = f"{bank_name}_last_update"
             LOGGER.debug(f"Updating Attribute name: {attr_name}")
 
@@ -468,11 +568,23 @@ class BankUpdateSensor(MonitorMySolarEntity, SensorEntity):
 
     async def async_added_to_hass(self):
         """Subscribe to events when added to hass."""
-        LOGGER.debug(f"Subscribing to bank update event for {self.entity_id}")
+        await super().async_added_to_hass()
+        LOGGER.debug(f"Subscribing to bank updates for {self.entity_id}")
         self.async_on_remove(
-            self.hass.bus.async_listen(f"{DOMAIN}_bank_updated", self._handle_bank_update)
+            async_dispatcher_connect(self.hass, self.coordinator.bank_signal, self._handle_bank_update)
         )
 
+    def _restore_state(self, last_state: State) -> bool:
+        """Restore the last update times of every bank."""
+        self._state = last_state.state
+        for attr_name in self._attributes:
+            self._attributes[attr_name] = last_state.attributes.get(attr_name)
+        return True
+
+    def _has_live_value(self) -> bool:
+        """Every write after the restored one comes from a bank arriving."""
+        return True
+
 class FaultWarningSensor(MonitorMySolarEntity, SensorEntity):
     def __init__(self, sensor_info, hass, entry, bank_name):
         """Initialize the fault/warning sensor."""
@@ -489,12 +601,23 @@ class FaultWarningSensor(MonitorMySolarEntity, SensorEntity):
         self._manufacturer = entry.data.get("inverter_brand")
         self._bank_name = bank_name
 
-        self._history = []
+        self._history = EventHistory(hass, self._unique_id, HISTORY_CAPACITY)
         self._state = "No Fault" if "fault" in sensor_info["unique_id"] else "No Warning"
         self._value = 0
 
         super().__init__(self.coordinator)
 
+    async def async_added_to_hass(self):
+        """Load the saved history before picking up the current value."""
+        await self._history.async_load()
+        await super().async_added_to_hass()
+
+    def _restore_state(self, last_state: State) -> bool:
+        """Restore the last fault or warning."""
+        self._state = last_state.state
+        self._value = last_state.attributes.get("value", 0)
+        return True
+
     @property
     def name(self):
         return self._name
@@ -513,11 +636,23 @@ class FaultWarningSensor(MonitorMySolarEntity, SensorEntity):
     @property
     def extra_state_attributes(self):
         """Return the state attributes."""
+        ongoing = self._history.ongoing
         attrs = {
             "value": self._value,
-            "history": self._history
+            "current": ongoing["description"] if ongoing else None,
+            "history_count": len(self._history),
+            "recent": self._history.recent(HISTORY_ATTRIBUTE_ENTRIES),
         }
         return attrs
+
+    async def async_get_event_history(self, offset: int, limit: int) -> ServiceResponse:
+        """Return a page of the full history, newest first."""
+        return {
+            "total": len(self._history),
+            "offset": offset,
+            "entries": self._history.page(offset, limit),
+        }
+
     @property
     def device_info(self):
         return {
@@ -530,40 +665,27 @@ class FaultWarningSensor(MonitorMySolarEntity, SensorEntity):
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
-        if self.entity_id in self.coordinator.entities:
-            value_data = self.coordinator.entities[self.entity_id]
-            LOGGER.debug(f"Value data: {value_data}")
-            if isinstance(value_data, dict):
-                self._value = value_data.get("value", 0)
-                description = value_data.get("description")
-                LOGGER.debug(f"Description: {description}")
-
-                if description:  # New fault/warning
-                    self._state = description
-                    start_time = value_data.get("start_time", "Unknown")
-                    end_time = value_data.get("end_time", "Ongoing")
-
-                    # Check if the last entry in history is ongoing and matches the current description
-                    if self._history and self._history[-1]["end_time"] == "Ongoing" and self._history[-1]["description"] == description:
-                        # Update the end time of the ongoing event
-                        self._history[-1]["end_time"] = end_time
-                    else:
-                        # Append a new entry for a new event
-                        self._history.append({
-                            "description": description,
-                            "value": self._value,
-                            "start_time": start_time,
-                            "end_time": end_time
-                        })
-                    LOGGER.debug(f"History: {self._history}")
-                else:  # Reset state
-                    self._state = "No Fault" if "fault" in self._sensor_type else "No Warning"
-
-                    # If there's an ongoing issue in history, mark it as resolved
-                    if self._history and self._history[-1]["end_time"] == "Ongoing":
-                        self._history[-1]["end_time"] = value_data.get("timestamp", "Unknown")
+        value_data = self.coordinator.entities.get_slot(self._slot)
+        LOGGER.debug(f"Value data: {value_data}")
+        if isinstance(value_data, dict):
+            self._value = value_data.get("value", 0)
+            description = value_data.get("description")
+            LOGGER.debug(f"Description: {description}")
+
+            if description:  # New fault/warning
+                self._state = description
+                start_time = value_data.get("start_time", "Unknown")
+                end_time = value_data.get("end_time", "Ongoing")
+
+                # Extends the ongoing entry if it is the same event, otherwise starts a new one
+                self._history.async_record(description, self._value, start_time, end_time)
+            else:  # Reset state
+                self._state = "No Fault" if "fault" in self._sensor_type else "No Warning"
+
+                # If there's an ongoing issue in history, mark it as resolved
+                self._history.async_resolve(value_data.get("timestamp", "Unknown"))
 
-            self.async_write_ha_state()
+        self.async_write_ha_state()
 
 class CalculatedSensor(MonitorMySolarEntity, SensorEntity):
     def __init__(self, sensor_info, hass, entry, bank_name):
@@ -585,12 +707,6 @@ class CalculatedSensor(MonitorMySolarEntity, SensorEntity):
         self._manufacturer = entry.data.get("inverter_brand")
         self._bank_name = bank_name
 
-        # Get calculation info
-        self._calculation = sensor_info.get("calculation", {})
-        self._operation = self._calculation.get("operation")
-        self._source_sensors = self._calculation.get("sensors", [])
-        self._sensor_values = {sensor: 0 for sensor in self._source_sensors}
-
         super().__init__(self.coordinator)
 
     @property
@@ -625,82 +741,15 @@ class CalculatedSensor(MonitorMySolarEntity, SensorEntity):
             "manufacturer": f"{self._manufacturer}",
         }
 
-    def _calculate_state(self):
-        """Calculate the state based on the operation and sensor values."""
-        if self._operation == "division":
-            numerator = self._sensor_values[self._source_sensors[0]]
-            denominator = self._sensor_values[self._source_sensors[1]]
-            if denominator and denominator != 0:
-                self._state = round(numerator / denominator, 2)
-            else:
-                self._state = 0
-
-        elif self._operation == "battery_time":
-            capacity_ah = self._sensor_values.get("batcapacity", 0)
-            voltage = self._sensor_values.get("vbat", 0)
-            load_watts = self._sensor_values.get("pload", 0)
-            battery_flow = self._sensor_values.get("batteryflow_live", 0)
-            soc = self._sensor_values.get("soc", 0)
-            pv_power = self._sensor_values.get("pall", 0)
-
-            if capacity_ah > 0 and voltage > 0 and soc > 0:
-                usable_energy_wh = (capacity_ah * voltage) * (soc / 100)
-                net_load = max(load_watts - pv_power, 0)
-                adjusted_load = net_load - battery_flow
-
-                if adjusted_load > 0:
-                    self._state = round(usable_energy_wh / adjusted_load, 2)
-                else:
-                    self._state = "Charging"
-
-                # Calculate attributes
-                self._attr_extra_state_attributes = {
-                    "calculated_kwh_storage_total": round(capacity_ah * voltage / 1000, 2),
-                    "calculated_kwh_left": round((capacity_ah * voltage * (soc / 100)) / 1000, 2),
-                }
-
-                # Calculate time battery empty
-                if adjusted_load > 0:
-                    hours_remaining = usable_energy_wh / adjusted_load
-                    current_time = datetime.now()
-                    empty_time = current_time + timedelta(hours=hours_remaining)
-
-                    self._attr_extra_state_attributes.update({
-                        "time_battery_empty": empty_time.strftime('%Y-%m-%d %H:%M:%S'),
-                        "human_readable_time_left": f"{int(hours_remaining)} hours, {int((hours_remaining - int(hours_remaining)) * 60)} minutes"
-                    })
-            else:
-                self._state = "Unavailable"
-                self._attr_extra_state_attributes = {
-                    "calculated_kwh_storage_total": "Unavailable",
-                    "calculated_kwh_left": "Unavailable",
-                    "time_battery_empty": "Unavailable",
-                    "human_readable_time_left": "Unavailable"
-                }
+    @property
+    def extra_state_attributes(self):
+        return self.coordinator.derived_attributes.get(self._slot)
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Update sensor with latest data from coordinator."""
-        # Get our source sensor IDs using the entry ID format
-        source_entity_ids = {
-            f"sensor.{self._formatted_id}_{sensor.lower()}": sensor
-            for sensor in self._source_sensors
-        }
-
-        for entity_id in source_entity_ids.keys():
-            # Check if this event matches one of our source sensors
-             if entity_id in self.coordinator.entities:
-                value = self.coordinator.entities[entity_id]
-                if value is not None:
-                    sensor_name = source_entity_ids[entity_id]
-                    self._sensor_values[sensor_name] = float(value)
-
-                    # LOGGER.debug(
-                    #     f"Updated {sensor_name} value to {value} for calculated sensor {self.entity_id}"
-                    # )
-
-                    self._calculate_state()
-                    self.async_write_ha_state()
+        """Update sensor with the value the coordinator calculated."""
+        self._state = self.coordinator.entities.get_slot(self._slot)
+        self.async_write_ha_state()
 
 class TemperatureSensor(MonitorMySolarEntity, SensorEntity):
     def __init__(self, sensor_info, hass, entry, bank_name):
@@ -718,8 +767,7 @@ class TemperatureSensor(MonitorMySolarEntity, SensorEntity):
         self.entity_id = f"sensor.{self._device_id}_{self._sensor_type.lower()}"
         self.hass = hass
         self._manufacturer = entry.data.get("inverter_brand")
-
-       
+        self._state_filter = StateFilter.from_entity_info(sensor_info, entry.options)
 
         super().__init__(self.coordinator)
 
@@ -768,25 +816,26 @@ class TemperatureSensor(MonitorMySolarEntity, SensorEntity):
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
-        if self.entity_id in self.coordinator.entities:
-            value = self.coordinator.entities[self.entity_id]
-            if value is not None:
-                # Default state to value sent in.
-                self._state = (
-                    round(value, 2) if isinstance(value, (float, int)) else value
-                )
-                # Check for HA config values and convert if neccessary.
-                if self.hass.config.units is US_CUSTOMARY_SYSTEM:
-                    # Const defines Celsius but HA should show Fahrenheit.
-                    if UnitOfTemperature.FAHRENHEIT != self.sensor_info.get("unit_of_measurement"):
-                        self._state = (
-                            round( (((value)*9/5)+32), 2 ) if isinstance(value, (float, int)) else value
-                        )
-                else:
-                    # Const defines Fahrenheit but HA should show Celsius.
-                    if UnitOfTemperature.CELSIUS != self.sensor_info.get("unit_of_measurement"):
-                        self._state = (
-                            round( ((value)-32/(9/5)), 2 ) if isinstance(value, (float, int)) else value
-                        )
-                LOGGER.debug(f"Sensor {self.entity_id} state updated to {self._state}")
-                self.async_write_ha_state()
+        value = self.coordinator.entities.get_slot(self._slot)
+        if value is None:
+            self._async_write_availability()
+        else:
+            # Default state to value sent in.
+            self._state = (
+                round(value, 2) if isinstance(value, (float, int)) else value
+            )
+            # Check for HA config values and convert if neccessary.
+            if self.hass.config.units is US_CUSTOMARY_SYSTEM:
+                # Const defines Celsius but HA should show Fahrenheit.
+                if UnitOfTemperature.FAHRENHEIT != self.sensor_info.get("unit_of_measurement"):
+                    self._state = (
+                        round( (((value)*9/5)+32), 2 ) if isinstance(value, (float, int)) else value
+                    )
+            else:
+                # Const defines Fahrenheit but HA should show Celsius.
+                if UnitOfTemperature.CELSIUS != self.sensor_info.get("unit_of_measurement"):
+                    self._state = (
+                        round( ((value)-32/(9/5)), 2 ) if isinstance(value, (float, int)) else value
+                    )
+            LOGGER.debug(f"Sensor {self.entity_id} state updated to {self._state}")
+            self._async_write_filtered_state(self._state)
@@ -0,0 +1,123 @@
+"""Services for Monitor My Solar."""
+from __future__ import annotations
+
+from functools import partial
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .const import DOMAIN, EVENT_RESTORE_PROGRESS
+from .coordinator import MonitorMySolar
+from .mqttHandeler import priority_for_context
+from .snapshots import SettingsSnapshots
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_PROFILE = "profile"
+ATTR_SETTINGS = "settings"
+ATTR_SNAPSHOT = "snapshot"
+
+SERVICE_APPLY_PROFILE = "apply_profile"
+SERVICE_EXPORT_SETTINGS = "export_settings"
+SERVICE_RESTORE_SETTINGS = "restore_settings"
+
+APPLY_PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_PROFILE, default="profile"): cv.string,
+        vol.Required(ATTR_SETTINGS): vol.All(
+            {cv.string: vol.Any(int, float, cv.string)}, vol.Length(min=1)
+        ),
+    }
+)
+
+SNAPSHOT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_SNAPSHOT): cv.string,
+    }
+)
+
+
+def _get_coordinator(hass: HomeAssistant, call: ServiceCall) -> MonitorMySolar:
+    """Return the coordinator of the config entry a service call targets."""
+    entry = hass.config_entries.async_get_entry(call.data[ATTR_CONFIG_ENTRY_ID])
+    if entry is None or entry.domain != DOMAIN:
+        raise ServiceValidationError(f"No Monitor My Solar entry {call.data[ATTR_CONFIG_ENTRY_ID]}")
+    if entry.state is not ConfigEntryState.LOADED:
+        raise ServiceValidationError(f"{entry.title} is not loaded")
+    return entry.runtime_data
+
+
+async def _async_apply_profile(call: ServiceCall) -> ServiceResponse:
+    """Apply a named set of settings to a dongle."""
+    coordinator = _get_coordinator(call.hass, call)
+    return await coordinator.async_apply_profile(
+        call.data[ATTR_PROFILE], call.data[ATTR_SETTINGS], priority_for_context(call.context)
+    )
+
+
+async def _async_export_settings(snapshots: SettingsSnapshots, call: ServiceCall) -> ServiceResponse:
+    """Save every writable setting of a dongle as a named snapshot."""
+    coordinator = _get_coordinator(call.hass, call)
+    settings = coordinator.settings_snapshot()
+    if not settings:
+        raise ServiceValidationError(f"No settings have been read from {coordinator.dongle_id} yet")
+    name = call.data.get(ATTR_SNAPSHOT, coordinator.dongle_id)
+    snapshot = await snapshots.async_save(
+        name, coordinator.dongle_id, coordinator.inverter_brand, coordinator.firmware_code, settings
+    )
+    return {ATTR_SNAPSHOT: name, **snapshot}
+
+
+async def _async_restore_settings(snapshots: SettingsSnapshots, call: ServiceCall) -> ServiceResponse:
+    """Write a saved snapshot back to a dongle, which may not be the one it was taken from."""
+    coordinator = _get_coordinator(call.hass, call)
+    name = call.data.get(ATTR_SNAPSHOT, coordinator.dongle_id)
+    snapshot = await snapshots.async_get(name)
+    if snapshot is None:
+        raise ServiceValidationError(f"No settings snapshot named {name}")
+    if snapshot["inverter_brand"] != coordinator.inverter_brand:
+        raise ServiceValidationError(
+            f"Snapshot {name} is from a {snapshot['inverter_brand']} inverter, not {coordinator.inverter_brand}"
+        )
+
+    def progress(done: int, total: int, failed: list[str]) -> None:
+        call.hass.bus.async_fire(EVENT_RESTORE_PROGRESS, {
+            "dongle_id": coordinator.dongle_id,
+            ATTR_SNAPSHOT: name,
+            "done": done,
+            "total": total,
+            "failed": list(failed),
+        })
+
+    return await coordinator.async_restore_settings(name, snapshot["settings"], progress)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+    snapshots = SettingsSnapshots(hass)
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_APPLY_PROFILE,
+        _async_apply_profile,
+        schema=APPLY_PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_SETTINGS,
+        partial(_async_export_settings, snapshots),
+        schema=SNAPSHOT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RESTORE_SETTINGS,
+        partial(_async_restore_settings, snapshots),
+        schema=SNAPSHOT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
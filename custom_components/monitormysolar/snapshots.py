@@ -0,0 +1,59 @@
+"""Named snapshots of inverter settings persisted under .storage."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.settings_snapshots"
+
+
+class SettingsSnapshots:
+    """Settings snapshots shared by every dongle, so one can be restored to a replacement.
+
+    Each snapshot is ``{"dongle_id", "inverter_brand", "firmware_code",
+    "created", "settings"}`` with settings mapping each writable setting to
+    its holdbank value.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._snapshots: dict[str, dict[str, Any]] | None = None
+
+    async def _async_snapshots(self) -> dict[str, dict[str, Any]]:
+        """Return the saved snapshots, loading them on first use."""
+        if self._snapshots is None:
+            data = await self._store.async_load()
+            self._snapshots = data.get("snapshots", {}) if data else {}
+        return self._snapshots
+
+    async def async_get(self, name: str) -> dict[str, Any] | None:
+        """Return a snapshot by name."""
+        return (await self._async_snapshots()).get(name)
+
+    async def async_save(
+        self,
+        name: str,
+        dongle_id: str,
+        inverter_brand: str,
+        firmware_code: str | None,
+        settings: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Save a snapshot, replacing any with the same name."""
+        snapshots = await self._async_snapshots()
+        snapshot = {
+            "dongle_id": dongle_id,
+            "inverter_brand": inverter_brand,
+            "firmware_code": firmware_code,
+            "created": dt_util.utcnow().isoformat(),
+            "settings": settings,
+        }
+        snapshots[name] = snapshot
+        await self._store.async_save({"snapshots": snapshots})
+        return snapshot
@@ -0,0 +1,104 @@
+"""Slot-indexed storage for the values of a dongle's entities."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+# What a slot currently holds
+KIND_EMPTY = 0
+KIND_INT = 1
+KIND_FLOAT = 2
+KIND_BOOL = 3
+KIND_OBJECT = 4
+
+# Integers beyond this cannot round-trip through a double
+_MAX_EXACT_INT = 2**53
+
+
+class StateStore(Mapping[str, Any]):
+    """Entity values keyed by entity_id and held in integer slots.
+
+    Every entity_id is given a slot once, at setup or the first time it is
+    seen. Numbers live unboxed in an array of doubles with a one byte kind
+    per slot so ints, floats and bools come back as the type that was
+    stored. Anything else (fault dicts, status payloads, version strings)
+    goes in a side table. Entities keep their slot and read it directly;
+    the Mapping interface is there for lookups by entity_id.
+    """
+
+    __slots__ = ("_slots", "_numbers", "_kinds", "_objects")
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self._slots: dict[str, int] = {}
+        self._numbers = array("d")
+        self._kinds = bytearray()
+        self._objects: dict[int, Any] = {}
+
+    def slot(self, entity_id: str) -> int:
+        """Return the slot for an entity_id, assigning one if needed."""
+        slot = self._slots.get(entity_id)
+        if slot is None:
+            slot = len(self._kinds)
+            self._slots[entity_id] = slot
+            self._numbers.append(0.0)
+            self._kinds.append(KIND_EMPTY)
+        return slot
+
+    def get_slot(self, slot: int) -> Any:
+        """Return the value held in a slot, or None if it is empty."""
+        kind = self._kinds[slot]
+        if kind == KIND_FLOAT:
+            return self._numbers[slot]
+        if kind == KIND_INT:
+            return int(self._numbers[slot])
+        if kind == KIND_OBJECT:
+            return self._objects[slot]
+        if kind == KIND_BOOL:
+            return self._numbers[slot] != 0.0
+        return None
+
+    def set_slot(self, slot: int, value: Any) -> bool:
+        """Store a value in a slot and return True if it changed."""
+        kind = self._kinds[slot]
+        value_type = type(value)
+        if value_type is float:
+            new_kind = KIND_FLOAT
+        elif value_type is int and -_MAX_EXACT_INT <= value <= _MAX_EXACT_INT:
+            new_kind = KIND_INT
+        elif value_type is bool:
+            new_kind = KIND_BOOL
+        elif value is None:
+            new_kind = KIND_EMPTY
+        else:
+            new_kind = KIND_OBJECT
+
+        if new_kind == KIND_OBJECT:
+            if kind == KIND_OBJECT and self._objects[slot] == value:
+                return False
+            self._objects[slot] = value
+        else:
+            if kind == new_kind and (new_kind == KIND_EMPTY or self._numbers[slot] == value):
+                return False
+            if kind == KIND_OBJECT:
+                del self._objects[slot]
+            self._numbers[slot] = 0.0 if value is None else value
+        self._kinds[slot] = new_kind
+        return True
+
+    def set(self, entity_id: str, value: Any) -> bool:
+        """Store a value by entity_id and return True if it changed."""
+        return self.set_slot(self.slot(entity_id), value)
+
+    def __getitem__(self, entity_id: str) -> Any:
+        return self.get_slot(self._slots[entity_id])
+
+    def __contains__(self, entity_id: object) -> bool:
+        return entity_id in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
@@ -1,10 +1,11 @@
 import logging
 from homeassistant.components.switch import SwitchEntity
-from homeassistant.core import callback
+from homeassistant.core import State, callback
 from homeassistant.helpers.event import (
     async_track_state_change_event,
 )
 from homeassistant.const import (
+    STATE_ON,
     STATE_UNKNOWN,
 )
 from .const import DOMAIN, ENTITIES, FIRMWARE_CODES
@@ -81,13 +82,10 @@ class InverterSwitch(MonitorMySolarEntity, SwitchEntity):
         if mqtt_handler is not None:
             self._previous_state = self._state
             self._state = True  # Optimistically update the state
-            self.async_write_ha_state()
             _LOGGER.info(f"Setting Switch on value for {self.entity_id}")
-            success = await mqtt_handler.send_update(
-                self._dongle_id, self.entity_info["unique_id"], 1, self
+            await self.coordinator.async_write_settings(
+                self, {self.entity_info["unique_id"]: 1}
             )
-            if not success:
-                self.revert_state()
         else:
             _LOGGER.error("MQTT Handler is not initialized")
 
@@ -97,13 +95,10 @@ class InverterSwitch(MonitorMySolarEntity, SwitchEntity):
         if mqtt_handler is not None:
             self._previous_state = self._state  # Save the current state before changing
             self._state = False  # Optimistically update the state in HA
-            self.async_write_ha_state()  # Update HA state immediately
             _LOGGER.info(f"Setting Switch off value for {self.entity_id}")
-            success = await mqtt_handler.send_update(
-                self._dongle_id, self.entity_info["unique_id"], 0, self
+            await self.coordinator.async_write_settings(
+                self, {self.entity_info["unique_id"]: 0}
             )
-            if not success:
-                self.revert_state()
         else:
             _LOGGER.error("MQTT Handler is not initialized")
 
@@ -113,15 +108,21 @@ class InverterSwitch(MonitorMySolarEntity, SwitchEntity):
             self._state = self._previous_state
             self.async_write_ha_state()
 
+    def _restore_state(self, last_state: State) -> bool:
+        """Restore the last known on/off state."""
+        self._state = last_state.state == STATE_ON
+        return True
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
 
         # This method is called by your DataUpdateCoordinator when a successful update runs.
-        if self.entity_id in self.coordinator.entities:
-            value = self.coordinator.entities[self.entity_id]
-            if value is not None:
-                self._state = bool(value)
-                #_LOGGER.debug(f"Switch {self.entity_id} state updated to {value}")
-                # Schedule state update on the main thread
-                self.hass.loop.call_soon_threadsafe(self.async_write_ha_state)
+        value = self.coordinator.entities.get_slot(self._slot)
+        if value is None:
+            self._async_write_availability()
+        else:
+            self._state = bool(value)
+            #_LOGGER.debug(f"Switch {self.entity_id} state updated to {value}")
+            # Schedule state update on the main thread
+            self.hass.loop.call_soon_threadsafe(self.async_write_ha_state)
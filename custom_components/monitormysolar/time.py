@@ -44,6 +44,7 @@ class InverterTime(MonitorMySolarEntity, TimeEntity):
         self._manufacturer = entry.data.get("inverter_brand")
         self._last_mqtt_update = None
         self._debounce_task = None
+        self._previous_state = None
 
         super().__init__(self.coordinator)
 
@@ -87,12 +88,11 @@ class InverterTime(MonitorMySolarEntity, TimeEntity):
                 return
 
             LOGGER.info(f"Setting time value for {self.entity_id} to {value}")
-            self.update_state(value)
-            await self.coordinator.mqtt_handler.send_update(
-                self._dongle_id.replace("_", "-"),
-                self.entity_info["unique_id"],
-                value.isoformat(),
-                self,
+            self._previous_state = self._state
+            self._state = value
+            self._last_mqtt_update = datetime.now()
+            await self.coordinator.async_write_settings(
+                self, {self.entity_info["unique_id"]: value.isoformat()}
             )
 
         self._debounce_task = asyncio.create_task(debounce())
@@ -109,6 +109,8 @@ class InverterTime(MonitorMySolarEntity, TimeEntity):
 
     def revert_state(self):
         """Revert to the previous state."""
+        LOGGER.info(f"Reverting state for {self.entity_id} to {self._previous_state}")
+        self._state = self._previous_state
         # Schedule state revert on the main thread
         self.hass.loop.call_soon_threadsafe(self.async_write_ha_state)
 
@@ -117,8 +119,9 @@ class InverterTime(MonitorMySolarEntity, TimeEntity):
         """Update sensor with latest data from coordinator."""
 
         # This method is called by your DataUpdateCoordinator when a successful update runs.
-        if self.entity_id in self.coordinator.entities:
-            value = self.coordinator.entities[self.entity_id]
-            if value is not None:
-                self.update_state(value)
-                self.async_write_ha_state()
+        value = self.coordinator.entities.get_slot(self._slot)
+        if value is None:
+            self._async_write_availability()
+        else:
+            self.update_state(value)
+            self.async_write_ha_state()
@@ -165,19 +165,22 @@ class InverterUpdate(MonitorMySolarEntity, UpdateEntity):
             return "Checking..."
         return latest
 
+    def _restore_state(self, last_state) -> bool:
+        """Versions come from the coordinator, so there is nothing to restore."""
+        return False
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
 
         # This method is called by your DataUpdateCoordinator when a successful update runs.
-        if self.entity_id in self.coordinator.entities:
-            value = self.coordinator.entities[self.entity_id]
-            if value is not None:
-                self._attr_installed_version = value
-                self.async_write_ha_state()
-                # LOGGER.debug(
-                #     f"Updated {self.name} installed version to: {value}"
-                # )
+        value = self.coordinator.entities.get_slot(self._slot)
+        if value is not None:
+            self._attr_installed_version = value
+            self.async_write_ha_state()
+            # LOGGER.debug(
+            #     f"Updated {self.name} installed version to: {value}"
+            # )
 
     # async def async_added_to_hass(self):
     #     # Initial state update
@@ -192,9 +195,12 @@ class InverterUpdate(MonitorMySolarEntity, UpdateEntity):
         LOGGER.debug(f"Install update called for {self.name}")
         mqtt_handler = self.coordinator.mqtt_handler
         if mqtt_handler:
+            # Nothing else may be sent to the dongle while it updates
             await mqtt_handler.send_update(
                 self._dongle_id,
                 self._update_command,
                 1,
-                self
+                self,
+                exclusive=True,
+                apply_result=False,
             )